@@ -8,14 +8,14 @@ if [ ! -d "$ROOT" ]; then
   exit 1
 fi
 
-total_files=$(find "$ROOT" -type f -print | wc -l | tr -d ' ')
-unique_files=$(find "$ROOT" -type f -print -exec shasum -a 256 {} + | awk '{print $1}' | sort -u | wc -l | tr -d ' ')
+total_files=$(find "$ROOT" -type f ! -name ".meta.json" -print | wc -l | tr -d ' ')
+unique_files=$(find "$ROOT" -type f ! -name ".meta.json" -print -exec shasum -a 256 {} + | awk '{print $1}' | sort -u | wc -l | tr -d ' ')
 
 echo "Total files: $total_files"
 echo "Unique files (sha256): $unique_files"
 echo "Extension distribution:"
 
-find "$ROOT" -type f -print | awk '{
+find "$ROOT" -type f ! -name ".meta.json" -print | awk '{
   file=$0
   sub(/^.*\//, "", file)
   ext="(no_ext)"
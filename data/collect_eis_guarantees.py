@@ -1,15 +1,17 @@
 from __future__ import annotations
 
 import argparse
-import json
-import mimetypes
-import signal
+import os
+import queue
 import sys
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from selenium.common.exceptions import TimeoutException
 
 from eis.config import (
     DEFAULT_HTML_SAVE_FIRST_N,
@@ -28,47 +30,73 @@ from eis.config import (
     SAMPLES_DIR,
     STATE_DIR,
 )
-from eis.downloader import clean_download_dir, download_attachments
+from eis.downloader import (
+    DIGEST_WORKERS,
+    HTTP_DOWNLOAD_WORKERS,
+    clean_download_dir,
+    download_attachments,
+    guess_mime_type,
+)
+from eis.http_client import build_http_session, fetch_html
 from eis.parser import is_missing_page, parse_document_info, parse_general_info
-from eis.selenium_client import build_driver, human_sleep, wait_for_any_selector, wait_for_ready
+from eis.selenium_client import (
+    SLEEP_TABLE_SIZE,
+    DriverPool,
+    human_sleep,
+    sleep_table,
+    wait_for_any_selector,
+    wait_for_ready,
+)
 from eis.storage import (
+    ATTRIBUTES_SCHEMA,
+    FILES_SCHEMA,
+    GUARANTEES_SCHEMA,
+    AttributeUnion,
+    CheckpointWAL,
+    HtmlSnapshotWriter,
     ParquetBatchWriter,
-    append_processed_id,
+    ProcessedIdLog,
+    ProcessedIdSet,
+    coarse_utc_now_iso,
     load_json,
     load_processed_ids,
     next_run_id,
     save_json,
     setup_logging,
-    update_attribute_union,
-    utc_now_iso,
 )
 
 
+GENERAL_URL_PREFIX, GENERAL_URL_SUFFIX = GENERAL_INFO_URL.split("{id}")
+DOCUMENTS_URL_PREFIX, DOCUMENTS_URL_SUFFIX = DOCUMENTS_URL.split("{id}")
+
+GENERAL_PAGE_MARKERS = ("blockInfo__title", "cardMainInfo")
+DOCUMENTS_PAGE_MARKERS = ("card-attachments__block",)
+
+
 class ProcessingTimeout(Exception):
     pass
 
 
-def _timeout_handler(signum, frame) -> None:
-    raise ProcessingTimeout("Per-ID processing timed out")
+@dataclass
+class Locks:
+    attribute_union: threading.Lock = field(default_factory=threading.Lock)
+    processed_ids: threading.Lock = field(default_factory=threading.Lock)
+    retry_state: threading.Lock = field(default_factory=threading.Lock)
 
 
 class PerIdTimeout:
+    # Deadline bookkeeping only: SIGALRM is main-thread only, so enforcement is
+    # done via inline deadline checks and Selenium's own per-driver timeouts.
     def __init__(self, seconds: int) -> None:
         self.seconds = seconds
-        self._prev_handler = None
+        self.deadline: float | None = None
 
     def __enter__(self):
-        if self.seconds <= 0 or threading.current_thread() is not threading.main_thread():
-            return self
-        self._prev_handler = signal.signal(signal.SIGALRM, _timeout_handler)
-        signal.alarm(self.seconds)
+        if self.seconds > 0:
+            self.deadline = time.monotonic() + self.seconds
         return self
 
     def __exit__(self, exc_type, exc, tb):
-        if self.seconds > 0 and threading.current_thread() is threading.main_thread():
-            signal.alarm(0)
-            if self._prev_handler is not None:
-                signal.signal(signal.SIGALRM, self._prev_handler)
         return False
 
 
@@ -81,89 +109,144 @@ def _remaining_seconds(deadline: float | None, default: float) -> int:
     return int(max(1.0, min(default, remaining)))
 
 
-def _ensure_time_left(deadline: float | None) -> None:
-    if deadline is None:
-        return
-    if time.monotonic() >= deadline:
-        raise ProcessingTimeout("Per-ID processing timed out")
+def _load_page(driver, url: str, deadline: float | None) -> None:
+    page_timeout = _remaining_seconds(deadline, 30)
+    driver.set_page_load_timeout(page_timeout)
+    driver.set_script_timeout(page_timeout)
+    try:
+        driver.get(url)
+    except TimeoutException as exc:
+        raise ProcessingTimeout("Per-ID processing timed out") from exc
+
+
+def _fetch_static_html(
+    session, url: str, deadline: float | None, markers: Tuple[str, ...]
+) -> Optional[str]:
+    # Returns None whenever the page should be loaded through the browser instead.
+    if session is None:
+        return None
+    html = fetch_html(session, url, timeout=_remaining_seconds(deadline, 30))
+    if not html or is_missing_page(html):
+        return None
+    if not any(marker in html for marker in markers):
+        return None
+    return html
 
 
 def _process_ids(
-    ids: List[int],
+    work_queue: queue.SimpleQueue,
     worker_id: int,
     run_id: int,
     args: argparse.Namespace,
     logger,
-    processed_ids: set[int],
-    state_lock: threading.Lock,
+    processed_ids: ProcessedIdSet,
+    locks: Locks,
     retry_state: Dict[str, int],
-    processed_ids_path: Path,
+    processed_id_log: ProcessedIdLog,
     retry_queue_path: Path,
-    checkpoint_path: Path,
+    checkpoint: CheckpointWAL,
+    attribute_union: AttributeUnion,
+    html_writer: HtmlSnapshotWriter,
+    driver_pool: Optional[DriverPool] = None,
+    sample_files: frozenset[str] = frozenset(),
 ) -> Dict[str, int]:
     stats = {"OK": 0, "MISSING": 0, "ERROR": 0, "PARTIAL": 0, "TIMEOUT": 0, "FILES": 0}
     save_html_count = 0
 
     driver = None
+    http_session = None
+    digest_pool: Optional[ThreadPoolExecutor] = None
+    http_pool: Optional[ThreadPoolExecutor] = None
     download_dir = RAW_ATTACHMENTS_DIR / "_incoming" / f"worker_{worker_id}"
 
     guarantees_writer = ParquetBatchWriter(
-        STATE_DIR.parent / "processed" / "guarantees", f"guarantees_run_{run_id}_w{worker_id}"
+        STATE_DIR.parent / "processed" / "guarantees",
+        f"guarantees_run_{run_id}_w{worker_id}",
+        schema=GUARANTEES_SCHEMA,
     )
+    # Attribute rows are dozens per ID; a larger row batch keeps each shard at
+    # roughly as many IDs as the guarantees shard instead of a handful.
     attributes_writer = ParquetBatchWriter(
-        STATE_DIR.parent / "processed" / "attributes", f"attributes_run_{run_id}_w{worker_id}"
+        STATE_DIR.parent / "processed" / "attributes",
+        f"attributes_run_{run_id}_w{worker_id}",
+        batch_size=4096,
+        schema=ATTRIBUTES_SCHEMA,
     )
     files_writer = ParquetBatchWriter(
-        STATE_DIR.parent / "processed" / "files", f"files_run_{run_id}_w{worker_id}"
+        STATE_DIR.parent / "processed" / "files",
+        f"files_run_{run_id}_w{worker_id}",
+        schema=FILES_SCHEMA,
     )
 
+    writers = (guarantees_writer, attributes_writer, files_writer)
+    # IDs are logged as processed only once every row they produced sits in a finished
+    # parquet file; a crash before that makes the resume redo them instead of losing them.
+    unlogged_ids: List[int] = []
+
+    def _finalize_shards() -> None:
+        for writer in writers:
+            writer.finalize()
+        for logged_id in unlogged_ids:
+            processed_id_log.append(logged_id)
+        unlogged_ids.clear()
+
     if args.worker_start_delay > 0:
         time.sleep(args.worker_start_delay * max(0, worker_id - 1))
 
+    sleeps = sleep_table(args.sleep_min, args.sleep_max)
+    monotonic = time.monotonic
+
     if args.mode == "live":
-        driver = build_driver(
-            download_dir=download_dir, headless=args.headless, block_images=args.block_images
-        )
+        driver = driver_pool.acquire()
+        download_dir = driver_pool.download_dir(driver)
+        if args.http_first or args.http_downloads:
+            http_session = build_http_session()
+        # Reused for every guarantee this worker handles.
+        digest_pool = ThreadPoolExecutor(max_workers=DIGEST_WORKERS)
+        if args.http_downloads:
+            http_pool = ThreadPoolExecutor(max_workers=HTTP_DOWNLOAD_WORKERS)
 
     def _restart_driver(reason: str) -> None:
-        nonlocal driver
+        nonlocal driver, download_dir
         if args.mode != "live":
             return
-        try:
-            if driver is not None:
-                driver.quit()
-        except Exception:
-            pass
-        driver = build_driver(
-            download_dir=download_dir, headless=args.headless, block_images=args.block_images
-        )
+        driver = driver_pool.recycle(driver)
+        download_dir = driver_pool.download_dir(driver)
         logger.warning("Worker %s restarted driver after %s", worker_id, reason)
 
     try:
-        for index, guarantee_id in enumerate(ids, start=1):
+        index = 0
+        while True:
+            try:
+                guarantee_id = work_queue.get_nowait()
+            except queue.Empty:
+                break
+            index += 1
             if guarantee_id in processed_ids and not args.force:
                 logger.info("Skipping %s (already processed)", guarantee_id)
                 continue
 
-            general_url = GENERAL_INFO_URL.format(id=guarantee_id)
-            documents_url = DOCUMENTS_URL.format(id=guarantee_id)
+            general_url = f"{GENERAL_URL_PREFIX}{guarantee_id}{GENERAL_URL_SUFFIX}"
+            documents_url = f"{DOCUMENTS_URL_PREFIX}{guarantee_id}{DOCUMENTS_URL_SUFFIX}"
             warnings: List[str] = []
             error_message = ""
             status = "OK"
-            attributes_rows: List[Dict[str, str]] = []
+            attribute_columns = _empty_attribute_columns()
             files_rows: List[Dict[str, str]] = []
             attachments: List[Dict[str, str]] = []
             general_html = ""
             documents_html = ""
 
-            deadline = (
-                time.monotonic() + args.per_id_timeout if args.per_id_timeout > 0 else None
-            )
             try:
-                with PerIdTimeout(args.per_id_timeout):
+                with PerIdTimeout(args.per_id_timeout) as per_id_timeout:
+                    deadline = per_id_timeout.deadline
                     if args.mode == "offline":
-                        _ensure_time_left(deadline)
-                        general_html = _load_sample_html(guarantee_id, "generalInformation") or ""
+                        if deadline is not None and monotonic() >= deadline:
+                            raise ProcessingTimeout("Per-ID processing timed out")
+                        general_html = (
+                            _load_sample_html(guarantee_id, "generalInformation", sample_files)
+                            or ""
+                        )
                         if not general_html:
                             status = "ERROR"
                             error_message = "Missing offline generalInformation HTML"
@@ -173,11 +256,15 @@ def _process_ids(
                         else:
                             sections, parse_warnings = parse_general_info(general_html)
                             warnings.extend(parse_warnings)
-                            attributes_rows = _attributes_rows(run_id, guarantee_id, sections)
+                            attribute_columns = _attribute_columns(run_id, guarantee_id, sections)
 
                         if status != "MISSING":
-                            _ensure_time_left(deadline)
-                            documents_html = _load_sample_html(guarantee_id, "document-info") or ""
+                            if deadline is not None and monotonic() >= deadline:
+                                raise ProcessingTimeout("Per-ID processing timed out")
+                            documents_html = (
+                                _load_sample_html(guarantee_id, "document-info", sample_files)
+                                or ""
+                            )
                             if documents_html:
                                 if is_missing_page(documents_html):
                                     status = "PARTIAL" if status == "OK" else status
@@ -190,8 +277,9 @@ def _process_ids(
                                     files_rows = _offline_files_rows(
                                         run_id, guarantee_id, attachments
                                     )
-                                    attributes_rows.extend(
-                                        _document_metadata_rows(run_id, guarantee_id, doc_meta)
+                                    _extend_columns(
+                                        attribute_columns,
+                                        _document_metadata_columns(run_id, guarantee_id, doc_meta),
                                     )
                             else:
                                 if status == "OK":
@@ -199,37 +287,55 @@ def _process_ids(
                                 warnings.append("Missing offline document-info HTML")
 
                     else:
-                        _ensure_time_left(deadline)
+                        if deadline is not None and monotonic() >= deadline:
+                            raise ProcessingTimeout("Per-ID processing timed out")
                         clean_download_dir(download_dir)
-                        driver.get(general_url)
-                        wait_for_ready(driver, timeout=_remaining_seconds(deadline, 30))
-                        general_html = driver.page_source or ""
+                        general_html = _fetch_static_html(
+                            http_session if args.http_first else None,
+                            general_url,
+                            deadline,
+                            GENERAL_PAGE_MARKERS,
+                        )
+                        if general_html is None:
+                            _load_page(driver, general_url, deadline)
+                            wait_for_ready(driver, timeout=_remaining_seconds(deadline, 30))
+                            general_html = driver.page_source or ""
+                            if not is_missing_page(general_html):
+                                wait_for_any_selector(
+                                    driver,
+                                    ["h2.blockInfo__title", ".blockInfo__title", "body"],
+                                    timeout=_remaining_seconds(deadline, 30),
+                                )
                         if is_missing_page(general_html):
                             status = "MISSING"
                         else:
-                            wait_for_any_selector(
-                                driver,
-                                ["h2.blockInfo__title", ".blockInfo__title", "body"],
-                                timeout=_remaining_seconds(deadline, 30),
-                            )
                             sections, parse_warnings = parse_general_info(general_html)
                             warnings.extend(parse_warnings)
-                            attributes_rows = _attributes_rows(run_id, guarantee_id, sections)
+                            attribute_columns = _attribute_columns(run_id, guarantee_id, sections)
 
                         if status != "MISSING":
-                            _ensure_time_left(deadline)
-                            driver.get(documents_url)
-                            wait_for_ready(driver, timeout=_remaining_seconds(deadline, 30))
-                            documents_html = driver.page_source or ""
+                            if deadline is not None and monotonic() >= deadline:
+                                raise ProcessingTimeout("Per-ID processing timed out")
+                            documents_html = _fetch_static_html(
+                                http_session if args.http_first else None,
+                                documents_url,
+                                deadline,
+                                DOCUMENTS_PAGE_MARKERS,
+                            )
+                            if documents_html is None:
+                                _load_page(driver, documents_url, deadline)
+                                wait_for_ready(driver, timeout=_remaining_seconds(deadline, 30))
+                                documents_html = driver.page_source or ""
+                                if not is_missing_page(documents_html):
+                                    wait_for_any_selector(
+                                        driver,
+                                        [".attachment__text", "body"],
+                                        timeout=_remaining_seconds(deadline, 30),
+                                    )
                             if is_missing_page(documents_html):
                                 status = "PARTIAL" if status == "OK" else status
                                 warnings.append("Document page missing")
                             else:
-                                wait_for_any_selector(
-                                    driver,
-                                    [".attachment__text", "body"],
-                                    timeout=_remaining_seconds(deadline, 30),
-                                )
                                 attachments, doc_meta, parse_warnings = parse_document_info(
                                     documents_html
                                 )
@@ -243,13 +349,18 @@ def _process_ids(
                                         attachments_root=RAW_ATTACHMENTS_DIR,
                                         download_dir=download_dir,
                                         force=args.force,
+                                        digest_pool=digest_pool,
                                     timeout=_remaining_seconds(deadline, args.download_timeout),
                                     stall_seconds=args.download_stall_seconds,
+                                        session=http_session if args.http_downloads else None,
+                                        http_pool=http_pool,
+                                        download_events=driver_pool.download_events(driver),
                                     )
                                 else:
                                     files_rows = []
-                                attributes_rows.extend(
-                                    _document_metadata_rows(run_id, guarantee_id, doc_meta)
+                                _extend_columns(
+                                    attribute_columns,
+                                    _document_metadata_columns(run_id, guarantee_id, doc_meta),
                                 )
                                 if attachments and not files_rows:
                                     status = "PARTIAL"
@@ -265,10 +376,12 @@ def _process_ids(
                     }:
                         if general_html:
                             save_html_snapshot(
-                                guarantee_id, general_html, "generalInformation"
+                                html_writer, guarantee_id, general_html, "generalInformation"
                             )
                         if documents_html:
-                            save_html_snapshot(guarantee_id, documents_html, "document-info")
+                            save_html_snapshot(
+                                html_writer, guarantee_id, documents_html, "document-info"
+                            )
                         save_html_count += 1
 
             except ProcessingTimeout as exc:
@@ -328,20 +441,28 @@ def _process_ids(
                 error=error_message,
             )
 
-            guarantees_writer.add([guarantee_row])
-            attributes_writer.add(attributes_rows)
+            guarantees_writer.append(guarantee_row)
+            attributes_flushed = attributes_writer.add(attribute_columns)
             files_writer.add(files_rows)
 
-            with state_lock:
-                update_attribute_union(
-                    STATE_DIR.parent / "processed" / "attribute_union.json", attributes_rows
+            stats[status] = stats.get(status, 0) + 1
+            stats["FILES"] += len(files_rows)
+
+            with locks.attribute_union:
+                attribute_union.update(
+                    zip(attribute_columns["section"], attribute_columns["field_name"])
                 )
-                append_processed_id(processed_ids_path, guarantee_id)
+                # New pairs are logged per ID; the snapshot is rewritten per attributes flush.
+                if attributes_flushed is not None:
+                    attribute_union.save()
+
+            unlogged_ids.append(guarantee_id)
+            if any(writer.due() for writer in writers):
+                _finalize_shards()
+            with locks.processed_ids:
                 processed_ids.add(guarantee_id)
 
-                stats[status] = stats.get(status, 0) + 1
-                stats["FILES"] += len(files_rows)
-
+            with locks.retry_state:
                 if status in {"ERROR", "PARTIAL", "TIMEOUT"}:
                     attempts = retry_state.get(str(guarantee_id), 0) + 1
                     if attempts < args.max_retries:
@@ -351,15 +472,14 @@ def _process_ids(
                 else:
                     retry_state.pop(str(guarantee_id), None)
 
-                save_json(
-                    checkpoint_path,
-                    {
-                        "run_id": run_id,
-                        "last_processed_id": guarantee_id,
-                        "stats": stats,
-                        "updated_at": utc_now_iso(),
-                    },
-                )
+            checkpoint.append(
+                {
+                    "run_id": run_id,
+                    "last_processed_id": guarantee_id,
+                    "stats": dict(stats),
+                    "updated_at": coarse_utc_now_iso(),
+                }
+            )
 
             logger.info(
                 "Worker %s processed %s status=%s files=%s",
@@ -375,15 +495,18 @@ def _process_ids(
                 elif index % LONG_SLEEP_EVERY == 0:
                     human_sleep(LONG_SLEEP_MIN, LONG_SLEEP_MAX)
                 else:
-                    human_sleep(args.sleep_min, args.sleep_max)
-
-        guarantees_writer.flush()
-        attributes_writer.flush()
-        files_writer.flush()
+                    time.sleep(sleeps[index & (SLEEP_TABLE_SIZE - 1)])
 
     finally:
+        _finalize_shards()
+        if http_pool is not None:
+            http_pool.shutdown(cancel_futures=True)
+        if digest_pool is not None:
+            digest_pool.shutdown()
+        if http_session is not None:
+            http_session.close()
         if driver is not None:
-            driver.quit()
+            driver_pool.release(driver)
 
     return stats
 
@@ -399,20 +522,22 @@ def parse_ids(args: argparse.Namespace, retry_ids: List[int]) -> List[int]:
         ids = ids[: args.max_ids]
 
     if not args.skip_retries and retry_ids:
-        ids = retry_ids + [i for i in ids if i not in retry_ids]
+        retry_set = set(retry_ids)
+        ids = retry_ids + [i for i in ids if i not in retry_set]
 
     return ids
 
 
 def save_html_snapshot(
-    guarantee_id: int, html: str, page_kind: str, force: bool = False
-) -> Optional[Path]:
-    RAW_HTML_DIR.mkdir(parents=True, exist_ok=True)
+    writer: HtmlSnapshotWriter,
+    guarantee_id: int,
+    html: str,
+    page_kind: str,
+    force: bool = False,
+) -> Path:
     filename = f"{page_kind}_{guarantee_id}.html"
     path = RAW_HTML_DIR / filename
-    if path.exists() and not force:
-        return path
-    path.write_text(html, encoding="utf-8")
+    writer.submit(path, html.encode("utf-8"), force=force)
     return path
 
 
@@ -424,54 +549,72 @@ def _build_guarantee_row(
     documents_url: str,
     warnings: List[str],
     error: str,
-) -> Dict[str, str]:
+) -> Dict[str, Any]:
     return {
         "run_id": run_id,
         "id": guarantee_id,
         "status": status,
         "general_url": general_url,
         "documents_url": documents_url,
-        "fetched_at": utc_now_iso(),
-        "warnings": json.dumps(warnings, ensure_ascii=False),
+        "fetched_at": coarse_utc_now_iso(),
+        "warnings": list(warnings),
         "error": error,
     }
 
 
-def _attributes_rows(
+ATTRIBUTE_COLUMNS = (
+    "run_id",
+    "id",
+    "section",
+    "field_name",
+    "field_value",
+    "document_index",
+    "document_number",
+)
+
+
+def _empty_attribute_columns() -> Dict[str, List[Any]]:
+    return {name: [] for name in ATTRIBUTE_COLUMNS}
+
+
+def _extend_columns(target: Dict[str, List[Any]], source: Dict[str, List[Any]]) -> None:
+    for name, values in source.items():
+        target[name].extend(values)
+
+
+def _attribute_columns(
     run_id: int, guarantee_id: int, sections: Dict[str, Dict[str, str]]
-) -> List[Dict[str, str]]:
-    rows: List[Dict[str, str]] = []
+) -> Dict[str, List[Any]]:
+    section_names: List[str] = []
+    field_names: List[str] = []
     for section, fields in sections.items():
-        for field_name, field_value in fields.items():
-            rows.append(
-                {
-                    "run_id": run_id,
-                    "id": guarantee_id,
-                    "section": section,
-                    "field_name": field_name,
-                    "field_value": field_value,
-                }
-            )
-    return rows
+        section_names.extend([section] * len(fields))
+        field_names.extend(fields)
+    total = len(field_names)
+    return {
+        "run_id": [run_id] * total,
+        "id": [guarantee_id] * total,
+        "section": section_names,
+        "field_name": field_names,
+        "field_value": [value for fields in sections.values() for value in fields.values()],
+        "document_index": [None] * total,
+        "document_number": [None] * total,
+    }
 
 
-def _document_metadata_rows(
+def _document_metadata_columns(
     run_id: int, guarantee_id: int, metadata_rows: List[Dict[str, str]]
-) -> List[Dict[str, str]]:
-    rows: List[Dict[str, str]] = []
-    for item in metadata_rows:
-        rows.append(
-            {
-                "run_id": run_id,
-                "id": guarantee_id,
-                "section": DOCUMENT_META_SECTION,
-                "field_name": item.get("field_name", ""),
-                "field_value": item.get("field_value", ""),
-                "document_index": item.get("document_index"),
-                "document_number": item.get("document_number", ""),
-            }
-        )
-    return rows
+) -> Dict[str, List[Any]]:
+    total = len(metadata_rows)
+    return {
+        "run_id": [run_id] * total,
+        "id": [guarantee_id] * total,
+        "section": [DOCUMENT_META_SECTION] * total,
+        "field_name": [item.get("field_name", "") for item in metadata_rows],
+        "field_value": [item.get("field_value", "") for item in metadata_rows],
+        "document_index": [item.get("document_index") for item in metadata_rows],
+        "document_number": [item.get("document_number", "") for item in metadata_rows],
+    }
 
 
 def _offline_files_rows(
@@ -496,7 +639,7 @@ def _offline_files_rows(
                 "document_index": item.get("document_index"),
                 "document_number": item.get("document_number", ""),
                 "page_count": 0,
-                "mime_type": mimetypes.guess_type(stored_filename)[0] or "",
+                "mime_type": guess_mime_type(stored_filename),
                 "download_status": "SKIPPED_OFFLINE",
                 "sha256": "",
             }
@@ -504,11 +647,21 @@ def _offline_files_rows(
     return rows
 
 
-def _load_sample_html(guarantee_id: int, page_kind: str) -> Optional[str]:
-    path = SAMPLES_DIR / f"{page_kind}_{guarantee_id}.html"
-    if not path.exists():
+def _list_sample_files() -> frozenset[str]:
+    try:
+        with os.scandir(SAMPLES_DIR) as entries:
+            return frozenset(entry.name for entry in entries if entry.is_file())
+    except FileNotFoundError:
+        return frozenset()
+
+
+def _load_sample_html(
+    guarantee_id: int, page_kind: str, sample_files: frozenset[str]
+) -> Optional[str]:
+    filename = f"{page_kind}_{guarantee_id}.html"
+    if filename not in sample_files:
         return None
-    return path.read_text(encoding="utf-8")
+    return (SAMPLES_DIR / filename).read_text(encoding="utf-8")
 
 
 def main() -> int:
@@ -533,12 +686,17 @@ def main() -> int:
     parser.add_argument("--worker-start-delay", type=float, default=0.0)
     parser.add_argument("--download-timeout", type=int, default=300)
     parser.add_argument("--download-stall-seconds", type=int, default=120)
+    parser.add_argument("--http-first", action="store_true")
+    parser.add_argument("--http-downloads", action="store_true")
+    parser.add_argument("--spare-drivers", type=int, default=1)
     args = parser.parse_args()
 
     STATE_DIR.mkdir(parents=True, exist_ok=True)
     processed_ids_path = STATE_DIR / "processed_ids.txt"
     retry_queue_path = STATE_DIR / "retry_queue.json"
     checkpoint_path = STATE_DIR / "checkpoint.json"
+    checkpoint_wal_path = STATE_DIR / "checkpoint.ndjson"
+    attribute_union_path = STATE_DIR.parent / "processed" / "attribute_union.json"
     run_state_path = STATE_DIR / "run_state.json"
 
     retry_state = load_json(retry_queue_path, {})
@@ -553,49 +711,91 @@ def main() -> int:
     LOGS_DIR.mkdir(parents=True, exist_ok=True)
     logger = setup_logging(LOGS_DIR / f"collector_run_{run_id}.log", verbose=args.verbose)
     processed_ids = load_processed_ids(processed_ids_path)
+    processed_id_log = ProcessedIdLog(processed_ids_path)
+
+    checkpoint = CheckpointWAL(checkpoint_wal_path, checkpoint_path)
+    previous_checkpoint = checkpoint.replay()
+    if previous_checkpoint:
+        logger.debug(
+            "Previous checkpoint run_id=%s last_processed_id=%s",
+            previous_checkpoint.get("run_id"),
+            previous_checkpoint.get("last_processed_id"),
+        )
+    attribute_union = AttributeUnion(attribute_union_path)
+    html_writer = HtmlSnapshotWriter()
+
+    locks = Locks()
 
-    state_lock = threading.Lock()
-
-    if args.workers <= 1:
-        stats = _process_ids(
-            ids=ids,
-            worker_id=1,
-            run_id=run_id,
-            args=args,
-            logger=logger,
-            processed_ids=processed_ids,
-            state_lock=state_lock,
-            retry_state=retry_state,
-            processed_ids_path=processed_ids_path,
-            retry_queue_path=retry_queue_path,
-            checkpoint_path=checkpoint_path,
+    work_queue: queue.SimpleQueue = queue.SimpleQueue()
+    for guarantee_id in ids:
+        work_queue.put(guarantee_id)
+
+    sample_files = _list_sample_files() if args.mode == "offline" else frozenset()
+
+    driver_pool = None
+    if args.mode == "live":
+        driver_pool = DriverPool(
+            download_root=RAW_ATTACHMENTS_DIR / "_incoming",
+            spares=args.spare_drivers,
+            headless=args.headless,
+            block_images=args.block_images,
         )
-    else:
-        slices = [ids[i:: args.workers] for i in range(args.workers)]
-        stats = {"OK": 0, "MISSING": 0, "ERROR": 0, "PARTIAL": 0, "TIMEOUT": 0, "FILES": 0}
-        with ThreadPoolExecutor(max_workers=args.workers) as executor:
-            futures = [
-                executor.submit(
-                    _process_ids,
-                    ids_slice,
-                    worker_id,
-                    run_id,
-                    args,
-                    logger,
-                    processed_ids,
-                    state_lock,
-                    retry_state,
-                    processed_ids_path,
-                    retry_queue_path,
-                    checkpoint_path,
-                )
-                for worker_id, ids_slice in enumerate(slices, start=1)
-                if ids_slice
-            ]
-            for future in futures:
-                worker_stats = future.result()
-                for key, value in worker_stats.items():
-                    stats[key] = stats.get(key, 0) + value
+
+    try:
+        if args.workers <= 1:
+            stats = _process_ids(
+                work_queue=work_queue,
+                worker_id=1,
+                run_id=run_id,
+                args=args,
+                logger=logger,
+                processed_ids=processed_ids,
+                locks=locks,
+                retry_state=retry_state,
+                processed_id_log=processed_id_log,
+                retry_queue_path=retry_queue_path,
+                checkpoint=checkpoint,
+                attribute_union=attribute_union,
+                html_writer=html_writer,
+                driver_pool=driver_pool,
+                sample_files=sample_files,
+            )
+        else:
+            stats = {"OK": 0, "MISSING": 0, "ERROR": 0, "PARTIAL": 0, "TIMEOUT": 0, "FILES": 0}
+            worker_count = min(args.workers, len(ids))
+            with ThreadPoolExecutor(max_workers=worker_count) as executor:
+                futures = [
+                    executor.submit(
+                        _process_ids,
+                        work_queue,
+                        worker_id,
+                        run_id,
+                        args,
+                        logger,
+                        processed_ids,
+                        locks,
+                        retry_state,
+                        processed_id_log,
+                        retry_queue_path,
+                        checkpoint,
+                        attribute_union,
+                        html_writer,
+                        driver_pool,
+                        sample_files,
+                    )
+                    for worker_id in range(1, worker_count + 1)
+                ]
+                for future in futures:
+                    worker_stats = future.result()
+                    for key, value in worker_stats.items():
+                        stats[key] = stats.get(key, 0) + value
+    finally:
+        processed_id_log.close()
+        checkpoint.close()
+        attribute_union.close()
+        html_writer.close()
+        if driver_pool is not None:
+            driver_pool.close()
 
     save_json(retry_queue_path, retry_state)
     logger.info(
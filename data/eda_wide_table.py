@@ -1,47 +1,151 @@
 from __future__ import annotations
 
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import csv
+from functools import lru_cache
+import itertools
+import os
 from pathlib import Path
 import re
+from typing import Iterable
 
 import pandas as pd
-
-
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+GUARANTEE_COLS = ("id", "run_id")
+ATTRIBUTE_COLS = ("id", "run_id", "section", "field_name", "field_value", "document_index")
+# Attribute sections the wide table reads; everything else is skipped at load time.
+ATTRIBUTE_SECTIONS = (
+    "Информация о банке-гаранте",
+    "Информация о поставщике (подрядчике, исполнителе) – принципале",
+    "Информация о заказчике-бенефициаре",
+    "Сводная информация (верхний блок)",
+    "Сроки и сумма (нижний блок)",
+    "Информация о банковской гарантии",
+    "Документы: Информация о банковской гарантии",
+)
+FILE_COLS = (
+    "id",
+    "run_id",
+    "file_index",
+    "document_index",
+    "stored_path",
+    "stored_filename",
+    "sha256",
+    "file_exists",
+)
+# Free-text columns. Read from CSV, one that is empty in every row (e.g. sha256 of an
+# offline run) would be inferred as null[pyarrow], which fillna("") rejects.
+TEXT_COLS = frozenset(
+    ("section", "field_name", "field_value", "stored_path", "stored_filename", "sha256")
+)
+
+WHITESPACE_RE = re.compile(r"\s+")
+OKOPF_CODE_RE = re.compile(r"\(([^()]*)\)\s*$")
+TRAILING_PARENS_RE = re.compile(r"\s*\([^)]*\)\s*$")
+PARENS_RE = re.compile(r"\(.*?\)")
+NON_NUMERIC_RE = re.compile(r"[^0-9,.-]")
+CURRENCY_SYMBOL_RE = re.compile(r"([A-Za-zА-Яа-я₽$€]+)$")
+CURRENCY_CODE_RE = re.compile(r"ОКВ\s*(\d+)")
+
+
+@lru_cache(maxsize=1)
 def resolve_processed_base() -> Path:
     cwd = Path.cwd().resolve()
-    candidates = [
-        cwd / "data" / "processed",
-        cwd / "processed",
-    ]
-    for parent in [cwd, *cwd.parents]:
-        candidates.append(parent / "data" / "processed")
-    for candidate in candidates:
-        if candidate.exists():
-            return candidate
-    raise FileNotFoundError("Could not locate data/processed directory from cwd")
+    candidates = itertools.chain(
+        [cwd / "data" / "processed", cwd / "processed"],
+        (parent / "data" / "processed" for parent in [cwd, *cwd.parents]),
+    )
+    found = next((c for c in candidates if os.path.isdir(c)), None)
+    if found is None:
+        raise FileNotFoundError("Could not locate data/processed directory from cwd")
+    return found
+
+
+def extract_run_id(name: str) -> int | None:
+    # Equivalent to re.search(r"run_(\d+)_", name) with plain string scans.
+    start = name.find("run_")
+    while start != -1:
+        digits_start = start + 4
+        end = name.find("_", digits_start)
+        if end == -1:
+            return None
+        if end > digits_start and name[digits_start:end].isdecimal():
+            return int(name[digits_start:end])
+        start = name.find("run_", start + 1)
+    return None
 
 
-def extract_run_id(path: Path) -> int | None:
-    match = re.search(r"run_(\d+)_", path.name)
-    if not match:
+def latest_run_id(path: Path) -> int | None:
+    latest = None
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if not entry.name.endswith(".parquet"):
+                    continue
+                run_id = extract_run_id(entry.name)
+                if run_id is not None and (latest is None or run_id > latest):
+                    latest = run_id
+    except FileNotFoundError:
         return None
-    return int(match.group(1))
+    return latest
 
 
-def latest_run_id(path: Path) -> int | None:
-    run_ids = [extract_run_id(p) for p in path.glob("*.parquet")]
-    run_ids = [rid for rid in run_ids if rid is not None]
-    return max(run_ids) if run_ids else None
+def is_wanted_column(name: str, columns: Iterable[str]) -> bool:
+    # Unnamed/index columns are kept because normalize_columns may recover "id" from them.
+    key = str(name).strip().lower()
+    return key in columns or key.startswith("unnamed") or key in ("index", "")
 
 
-def read_run_parquets(path: Path, run_id: int | None) -> pd.DataFrame:
+def read_run_parquets(
+    path: Path,
+    run_id: int | None,
+    columns: Iterable[str] | None = None,
+    filters: list[tuple] | None = None,
+) -> pd.DataFrame:
     if run_id is None:
         files = list(path.glob("*.parquet"))
     else:
         files = list(path.glob(f"*run_{run_id}_*.parquet"))
     if not files:
         return pd.DataFrame()
-    frames = [pd.read_parquet(file) for file in sorted(files)]
-    return pd.concat(frames, ignore_index=True)
+
+    # One lazy dataset over all shards: the projection and filters are applied inside the
+    # multithreaded Arrow scan, and the result is converted to pandas once instead of
+    # concatenating per-file frames. Shards written before a column ever had a value
+    # store it as null-typed, hence the permissive schema unification.
+    schema = pa.unify_schemas(
+        [pq.read_schema(file) for file in sorted(files)], promote_options="permissive"
+    )
+    names = None
+    if columns is not None:
+        names = [n for n in schema.names if is_wanted_column(n, columns)] or None
+    dataset = ds.dataset(sorted(files), schema=schema, format="parquet")
+    table = dataset.to_table(
+        columns=names,
+        filter=pq.filters_to_expression(filters) if filters else None,
+    )
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def read_csv_columns(path: Path, columns: Iterable[str]) -> pd.DataFrame:
+    with path.open(newline="", encoding="utf-8") as handle:
+        header = next(csv.reader(handle), [])
+    usecols = [name for name in header if is_wanted_column(name, columns)]
+    text_dtype = pd.ArrowDtype(pa.string())
+    dtype = {name: text_dtype for name in usecols if name.strip().lower() in TEXT_COLS}
+    return pd.read_csv(
+        path,
+        engine="pyarrow",
+        usecols=usecols or None,
+        dtype=dtype or None,
+        dtype_backend="pyarrow",
+    )
 
 
 def read_latest_csvs(final_dir: Path) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame] | None:
@@ -50,37 +154,84 @@ def read_latest_csvs(final_dir: Path) -> tuple[pd.DataFrame, pd.DataFrame, pd.Da
     files_path = final_dir / "files_latest.csv"
     if not (guarantees_path.exists() and attributes_path.exists() and files_path.exists()):
         return None
-    guarantees = pd.read_csv(guarantees_path)
-    attributes = pd.read_csv(attributes_path)
-    files = pd.read_csv(files_path)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        guarantees, attributes, files = executor.map(
+            read_csv_columns,
+            [guarantees_path, attributes_path, files_path],
+            [GUARANTEE_COLS, ATTRIBUTE_COLS, FILE_COLS],
+        )
     return guarantees, attributes, files
 
 
+def scan_file_sizes(paths: pd.Series) -> dict[str, int]:
+    # One directory listing per parent instead of a stat() call per row; paths that do
+    # not exist are left out of the result. Redactions often share a stored file, so
+    # only unique paths are looked up.
+    by_dir: dict[str, list[tuple[str, str]]] = defaultdict(list)
+    for path in paths.dropna().unique():
+        if isinstance(path, str) and path:
+            parent, name = os.path.split(path)
+            by_dir[parent].append((path, name))
+
+    def scan_dir(parent: str, items: list[tuple[str, str]]) -> dict[str, int]:
+        found: dict[str, int] = {}
+        try:
+            with os.scandir(parent or ".") as it:
+                entries = {entry.name: entry for entry in it}
+        except OSError:
+            return found
+        for path, name in items:
+            try:
+                if name in ("", ".", ".."):
+                    found[path] = os.stat(path).st_size
+                elif name in entries:
+                    found[path] = entries[name].stat().st_size
+            except OSError:
+                pass
+        return found
+
+    sizes: dict[str, int] = {}
+    if not by_dir:
+        return sizes
+    # scandir/stat release the GIL, so directories are listed concurrently.
+    with ThreadPoolExecutor(max_workers=min(16, len(by_dir))) as executor:
+        for found in executor.map(scan_dir, by_dir.keys(), by_dir.values()):
+            sizes.update(found)
+    return sizes
+
+
+def has_numeric_values(series: pd.Series) -> bool:
+    head = series.head(1024)
+    if pd.to_numeric(head, errors="coerce").notna().any():
+        return True
+    return len(series) > len(head) and pd.to_numeric(series, errors="coerce").notna().any()
+
+
 def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df.columns = [str(c).strip() for c in df.columns]
-    if "id" not in df.columns:
-        for col in df.columns:
-            if str(col).strip().lower() == "id":
-                df = df.rename(columns={col: "id"})
+    # Only column labels are touched; rename() shares the column data instead of copying it.
+    df = df.rename(columns=lambda c: str(c).strip())
+    columns = list(df.columns)
+    rename_map: dict[str, str] = {}
+    if "id" not in columns:
+        for col in columns:
+            if col.lower() == "id":
+                rename_map[col] = "id"
                 break
-    if "id" not in df.columns:
-        unnamed_cols = [
-            col
-            for col in df.columns
-            if str(col).strip().lower().startswith("unnamed")
-            or str(col).strip().lower() == "index"
-        ]
-        for col in unnamed_cols:
-            series = pd.to_numeric(df[col], errors="coerce")
-            if series.notna().any():
-                df = df.rename(columns={col: "id"})
+    if "id" not in columns and not rename_map:
+        for col in columns:
+            lowered = col.lower()
+            if (lowered.startswith("unnamed") or lowered in ("index", "")) and has_numeric_values(
+                df[col]
+            ):
+                rename_map[col] = "id"
                 break
-    if "run_id" not in df.columns:
-        for col in df.columns:
-            if str(col).strip().lower() == "run_id":
-                df = df.rename(columns={col: "run_id"})
+    if "run_id" not in columns:
+        for col in columns:
+            if col.lower() == "run_id":
+                rename_map[col] = "run_id"
                 break
+    if rename_map:
+        df = df.rename(columns=rename_map)
     if "id" not in df.columns and df.index.name and df.index.name.lower() == "id":
         df = df.reset_index()
     return df
@@ -92,17 +243,28 @@ def main() -> None:
     csvs = read_latest_csvs(final_dir)
     if csvs is not None:
         guarantees_latest, attributes_latest, files_latest = csvs
+        attributes_latest = attributes_latest[
+            attributes_latest["section"].isin(ATTRIBUTE_SECTIONS)
+        ]
         run_id = None
     else:
         run_id = latest_run_id(base / "guarantees")
         if run_id is None:
             raise RuntimeError("No run_id found in processed/guarantees")
-        guarantees_latest = read_run_parquets(base / "guarantees", run_id)
-        attributes_latest = read_run_parquets(base / "attributes", run_id)
-        files_latest = read_run_parquets(base / "files", run_id)
+        guarantees_latest = read_run_parquets(base / "guarantees", run_id, GUARANTEE_COLS)
+        attributes_latest = read_run_parquets(
+            base / "attributes",
+            run_id,
+            ATTRIBUTE_COLS,
+            filters=[("section", "in", ATTRIBUTE_SECTIONS)],
+        )
+        files_latest = read_run_parquets(base / "files", run_id, FILE_COLS)
 
     guarantees_latest = normalize_columns(guarantees_latest)
     attributes_latest = normalize_columns(attributes_latest)
+    # Small fixed vocabularies: comparisons and sorts below run on integer codes.
+    for col in ("section", "field_name"):
+        attributes_latest[col] = attributes_latest[col].astype("category")
     files_latest = normalize_columns(files_latest)
 
     if "id" not in files_latest.columns:
@@ -112,77 +274,80 @@ def main() -> None:
 
     # Filter to guarantees with existing files and select one file per guarantee
     files_latest = files_latest.copy()
+    sizes = None
     if "file_exists" not in files_latest.columns:
-        files_latest["file_exists"] = files_latest["stored_path"].apply(
-            lambda p: isinstance(p, str) and p and Path(p).exists()
-        )
+        sizes = scan_file_sizes(files_latest["stored_path"])
+        files_latest["file_exists"] = files_latest["stored_path"].map(sizes).notna()
 
     files_existing = files_latest[files_latest["file_exists"]].copy()
 
-    def file_size(path_value: str) -> int:
-        try:
-            return Path(path_value).stat().st_size
-        except Exception:
-            return -1
-
-    files_existing["size_bytes"] = files_existing["stored_path"].apply(file_size)
+    # Every id with an existing file ends up with exactly one selected file, so attributes
+    # of other ids can be dropped before the metadata reshape and extraction.
+    attributes_latest = attributes_latest[
+        attributes_latest["id"].isin(pd.Index(files_existing["id"].dropna().unique()))
+    ]
 
     # Document metadata for current versions
     meta = attributes_latest[
         attributes_latest["section"].eq("Документы: Информация о банковской гарантии")
     ].copy()
 
-    meta_pivot = meta.pivot_table(
-        index=["id", "run_id", "document_index"],
-        columns="field_name",
-        values="field_value",
-        aggfunc="first",
-    ).reset_index()
+    # Same result as pivot_table(aggfunc="first"), which takes the first non-null
+    # value per key, but through a plain dedup + unstack.
+    meta_keys = ["id", "run_id", "document_index", "field_name"]
+    meta_pivot = (
+        meta.dropna(subset=[*meta_keys, "field_value"])
+        .drop_duplicates(meta_keys)
+        .set_index(meta_keys)["field_value"]
+        .unstack("field_name")
+        .reset_index()
+    )
 
-    current_doc_idx = (
-        meta_pivot[
-            meta_pivot.get("Редакция", "")
-            .astype(str)
-            .str.contains("Действующая", na=False)
+    # Flat (id, document_index) pairs of the current redactions.
+    current_pairs = pd.MultiIndex.from_frame(
+        meta_pivot.loc[
+            meta_pivot.get("Редакция", "").astype(str).str.contains("Действующая", na=False),
+            ["id", "document_index"],
         ]
-        .groupby("id")["document_index"]
-        .apply(lambda s: set(s.dropna().tolist()))
-        .to_dict()
+        .dropna()
+        .drop_duplicates()
     )
 
-    def choose_file(group: pd.DataFrame) -> pd.DataFrame:
-        gid = group.name
-        candidates = group.copy()
-        if "id" not in candidates.columns:
-            candidates = candidates.assign(id=gid)
+    def choose_files(candidates: pd.DataFrame) -> pd.DataFrame:
+        candidates = candidates[candidates["id"].notna()]
+        ids = candidates["id"]
 
-        if gid in current_doc_idx and current_doc_idx[gid]:
-            filtered = candidates[candidates["document_index"].isin(current_doc_idx[gid])]
-            if not filtered.empty:
-                candidates = filtered
+        # Prefer files of the current redaction when an id has any.
+        in_current = pd.Series(
+            pd.MultiIndex.from_arrays([ids, candidates["document_index"]]).isin(current_pairs),
+            index=candidates.index,
+        )
+        has_current = in_current.groupby(ids).transform("any")
+        candidates = candidates[in_current | ~has_current]
+        ids = candidates["id"]
 
         # If all hashes are identical, keep one.
         hashes = candidates["sha256"].fillna("")
-        unique_hashes = [h for h in hashes.unique().tolist() if h]
-        if len(unique_hashes) == 1:
-            candidates = candidates[hashes.eq(unique_hashes[0])]
-
-        # Otherwise keep the smallest file, tie-break by file_index.
-        candidates = candidates.assign(
-            size_bytes=candidates["size_bytes"].where(
-                candidates["size_bytes"] >= 0, 10**18
-            )
-        ).sort_values(["size_bytes", "file_index"])
-        return candidates.head(1)
+        non_empty = hashes.ne("")
+        single_hash = hashes.where(non_empty).groupby(ids).transform("nunique").eq(1)
+        candidates = candidates[non_empty | ~single_hash]
+
+        # Otherwise keep the smallest file, tie-break by file_index. Sizes only matter for
+        # ids that still have more than one candidate; unreadable sizes sort last.
+        contested = candidates["id"].duplicated(keep=False)
+        size_lookup = sizes
+        if size_lookup is None:
+            size_lookup = scan_file_sizes(candidates.loc[contested, "stored_path"])
+        size_bytes = candidates["stored_path"].map(size_lookup).fillna(10**18).astype("int64")
+        candidates = candidates.assign(size_bytes=size_bytes.where(contested, 0)).sort_values(
+            ["id", "size_bytes", "file_index"]
+        )
+        return candidates.drop_duplicates("id").reset_index(drop=True)
 
     if files_existing.empty:
         selected_files = files_existing.copy()
     else:
-        selected_files = (
-            files_existing.groupby("id", group_keys=False)
-            .apply(choose_file)
-            .reset_index(drop=True)
-        )
+        selected_files = choose_files(files_existing)
     selected_files = normalize_columns(selected_files)
     if "id" not in selected_files.columns:
         if selected_files.index.name and selected_files.index.name.lower() == "id":
@@ -195,141 +360,150 @@ def main() -> None:
 
     # Keep only guarantees with an existing selected file
     selected_ids = selected_files["id"].unique()
-    guarantees_latest = guarantees_latest[guarantees_latest["id"].isin(selected_ids)].copy()
-    attributes_latest = attributes_latest[attributes_latest["id"].isin(selected_ids)].copy()
+    guarantees_latest = guarantees_latest[guarantees_latest["id"].isin(selected_ids)]
 
     # Build wide analytical table
     base_df = guarantees_latest[["id", "run_id"]].drop_duplicates()
-    attr = attributes_latest.copy()
-
-    def get_attr_value(section: str, field_names, column_name: str) -> pd.DataFrame:
-        if isinstance(field_names, str):
-            field_names = [field_names]
-        sub = attr[(attr["section"] == section) & (attr["field_name"].isin(field_names))].copy()
-        if sub.empty:
-            return base_df.assign(**{column_name: pd.NA})[["id", "run_id", column_name]]
-        sub["field_name"] = pd.Categorical(sub["field_name"], categories=field_names, ordered=True)
-        sub = sub.sort_values(["id", "run_id", "field_name"])
-        sub = sub.drop_duplicates(["id", "run_id"])
-        return sub[["id", "run_id", "field_value"]].rename(columns={"field_value": column_name})
-
-    def get_attr_label(section: str, field_names, column_name: str) -> pd.DataFrame:
-        if isinstance(field_names, str):
-            field_names = [field_names]
-        sub = attr[(attr["section"] == section) & (attr["field_name"].isin(field_names))].copy()
-        if sub.empty:
-            return base_df.assign(**{column_name: pd.NA})[["id", "run_id", column_name]]
-        sub["field_name"] = pd.Categorical(sub["field_name"], categories=field_names, ordered=True)
-        sub = sub.sort_values(["id", "run_id", "field_name"])
-        sub = sub.drop_duplicates(["id", "run_id"])
-        return sub[["id", "run_id", "field_name"]].rename(columns={"field_name": column_name})
-
-    # Bank info
-    bank_inn = get_attr_value("Информация о банке-гаранте", "ИНН", "bank_inn")
-    bank_name = get_attr_value(
-        "Информация о банке-гаранте",
-        "Сокращенное наименование банка",
-        "bank_name",
-    )
-
-    # Principal info
-    pcpl_inn = get_attr_value(
-        "Информация о поставщике (подрядчике, исполнителе) – принципале",
-        "ИНН",
-        "pcpl_inn",
-    )
-    pcpl_name = get_attr_value(
-        "Информация о поставщике (подрядчике, исполнителе) – принципале",
-        [
-            "Сокращенное наименование поставщика (подрядчика, исполнителя)",
-            "Полное наименование поставщика (подрядчика, исполнителя)",
-        ],
-        "pcpl_name",
-    )
-    pcpl_region = get_attr_value(
-        "Информация о поставщике (подрядчике, исполнителе) – принципале",
-        "Наименование субъекта РФ (код)",
-        "pcpl_region",
-    )
-    pcpl_city = get_attr_value(
-        "Информация о поставщике (подрядчике, исполнителе) – принципале",
-        "Наименование населенного пункта местонахождения (код по ОКТМО)",
-        "pcpl_city",
-    )
-    pcpl_type = get_attr_value(
-        "Информация о поставщике (подрядчике, исполнителе) – принципале",
-        "Вид",
-        "pcpl_type",
-    )
-
-    # Beneficiary info
-    bene_inn = get_attr_value("Информация о заказчике-бенефициаре", "ИНН", "bene_inn")
-    bene_name = get_attr_value(
-        "Информация о заказчике-бенефициаре",
-        [
-            "Сокращенное наименование заказчика",
-            "Полное наименование заказчика",
-            "Сокращенное наименование Заказчика",
-            "Полное наименование Заказчика",
-            "Сокращенное наименование заказчика-бенефициара",
-            "Полное наименование заказчика-бенефициара",
-        ],
-        "bene_name",
-    )
-    bene_region = get_attr_value(
-        "Информация о заказчике-бенефициаре",
-        "Наименование субъекта РФ (код)",
-        "bene_region",
-    )
-    bene_city = get_attr_value(
-        "Информация о заказчике-бенефициаре",
-        "Наименование населенного пункта местонахождения (код по ОКТМО)",
-        "bene_city",
-    )
-    bene_type = get_attr_value(
-        "Информация о заказчике-бенефициаре",
-        "Организационно-правовая форма (код по ОКОПФ)",
-        "bene_type",
-    )
-
-    # Guarantee info
-    issue_date = get_attr_value(
-        "Сводная информация (верхний блок)", "Выдача банковской гарантии", "issue_date"
-    )
-    start_date = get_attr_value(
-        "Сроки и сумма (нижний блок)", "Дата вступления в силу", "start_date"
-    )
-    end_date = get_attr_value(
-        "Сроки и сумма (нижний блок)", "Дата окончания срока действия", "end_date"
-    )
-    end_date_fallback = get_attr_value(
-        "Сводная информация (верхний блок)", "Окончание срока действия", "end_date_fallback"
-    )
-
-    sum_summary = get_attr_value(
-        "Сводная информация (верхний блок)", "Размер банковской гарантии", "sum_summary"
-    )
-
+    attr = attributes_latest
     sum_field_names = [
         name for name in attr["field_name"].unique() if str(name).startswith("Денежная сумма,")
     ]
-    sum_lower = get_attr_value("Сроки и сумма (нижний блок)", sum_field_names, "sum_lower")
-    currency_label = get_attr_label(
-        "Сроки и сумма (нижний блок)", sum_field_names, "currency_from_label"
-    )
 
-    ikz = get_attr_value(
-        "Информация о банковской гарантии",
-        ["Идентификационный код закупки (ИКЗ)", "Идентификационный код закупки"],
-        "ikz",
+    # Output column, section, candidate field names in order of preference, and whether
+    # the field's value or its label is taken.
+    attribute_targets = [
+        # Bank info
+        ("bank_inn", "Информация о банке-гаранте", ["ИНН"], "value"),
+        ("bank_name", "Информация о банке-гаранте", ["Сокращенное наименование банка"], "value"),
+        # Principal info
+        (
+            "pcpl_inn",
+            "Информация о поставщике (подрядчике, исполнителе) – принципале",
+            ["ИНН"],
+            "value",
+        ),
+        (
+            "pcpl_name",
+            "Информация о поставщике (подрядчике, исполнителе) – принципале",
+            [
+                "Сокращенное наименование поставщика (подрядчика, исполнителя)",
+                "Полное наименование поставщика (подрядчика, исполнителя)",
+            ],
+            "value",
+        ),
+        (
+            "pcpl_region",
+            "Информация о поставщике (подрядчике, исполнителе) – принципале",
+            ["Наименование субъекта РФ (код)"],
+            "value",
+        ),
+        (
+            "pcpl_city",
+            "Информация о поставщике (подрядчике, исполнителе) – принципале",
+            ["Наименование населенного пункта местонахождения (код по ОКТМО)"],
+            "value",
+        ),
+        (
+            "pcpl_type",
+            "Информация о поставщике (подрядчике, исполнителе) – принципале",
+            ["Вид"],
+            "value",
+        ),
+        # Beneficiary info
+        ("bene_inn", "Информация о заказчике-бенефициаре", ["ИНН"], "value"),
+        (
+            "bene_name",
+            "Информация о заказчике-бенефициаре",
+            [
+                "Сокращенное наименование заказчика",
+                "Полное наименование заказчика",
+                "Сокращенное наименование Заказчика",
+                "Полное наименование Заказчика",
+                "Сокращенное наименование заказчика-бенефициара",
+                "Полное наименование заказчика-бенефициара",
+            ],
+            "value",
+        ),
+        (
+            "bene_region",
+            "Информация о заказчике-бенефициаре",
+            ["Наименование субъекта РФ (код)"],
+            "value",
+        ),
+        (
+            "bene_city",
+            "Информация о заказчике-бенефициаре",
+            ["Наименование населенного пункта местонахождения (код по ОКТМО)"],
+            "value",
+        ),
+        (
+            "bene_type",
+            "Информация о заказчике-бенефициаре",
+            ["Организационно-правовая форма (код по ОКОПФ)"],
+            "value",
+        ),
+        # Guarantee info
+        (
+            "issue_date",
+            "Сводная информация (верхний блок)",
+            ["Выдача банковской гарантии"],
+            "value",
+        ),
+        ("start_date", "Сроки и сумма (нижний блок)", ["Дата вступления в силу"], "value"),
+        ("end_date", "Сроки и сумма (нижний блок)", ["Дата окончания срока действия"], "value"),
+        (
+            "end_date_fallback",
+            "Сводная информация (верхний блок)",
+            ["Окончание срока действия"],
+            "value",
+        ),
+        (
+            "sum_summary",
+            "Сводная информация (верхний блок)",
+            ["Размер банковской гарантии"],
+            "value",
+        ),
+        ("sum_lower", "Сроки и сумма (нижний блок)", sum_field_names, "value"),
+        ("currency_from_label", "Сроки и сумма (нижний блок)", sum_field_names, "label"),
+        (
+            "ikz",
+            "Информация о банковской гарантии",
+            ["Идентификационный код закупки (ИКЗ)", "Идентификационный код закупки"],
+            "value",
+        ),
+        ("coverage_type", "Информация о банковской гарантии", ["Вид обеспечения"], "value"),
+        (
+            "guarantee_number",
+            "Сводная информация (верхний блок)",
+            ["Номер банковской гарантии"],
+            "value",
+        ),
+    ]
+    targets = pd.DataFrame(
+        [
+            (section, field_name, column, priority, kind)
+            for column, section, field_names, kind in attribute_targets
+            for priority, field_name in enumerate(field_names)
+        ],
+        columns=["section", "field_name", "column", "priority", "kind"],
     )
 
-    coverage_type = get_attr_value(
-        "Информация о банковской гарантии", "Вид обеспечения", "coverage_type"
+    # One join and one sort pick, per output column and (id, run_id), the first row of
+    # the most preferred field name; a single unstack then spreads them into columns.
+    matched = (
+        attr[attr["field_name"].isin(targets["field_name"])]
+        .astype({"section": str, "field_name": str})
+        .merge(targets, on=["section", "field_name"], how="inner")
     )
-
-    guarantee_number = get_attr_value(
-        "Сводная информация (верхний блок)", "Номер банковской гарантии", "guarantee_number"
+    matched["value"] = matched["field_value"].where(
+        matched["kind"].eq("value"), matched["field_name"]
+    )
+    extracted = (
+        matched.sort_values(["column", "id", "run_id", "priority"])
+        .drop_duplicates(["column", "id", "run_id"])
+        .set_index(["id", "run_id", "column"])["value"]
+        .unstack("column")
+        .rename_axis(columns=None)
     )
 
     # Document metadata for selected files
@@ -347,42 +521,24 @@ def main() -> None:
         columns={"Номер банковской гарантии": "guarantee_number_doc"}
     )
 
-    # Assemble table
-    wide = base_df.copy()
-    for part in [
-        bank_inn,
-        bank_name,
-        pcpl_inn,
-        pcpl_name,
-        pcpl_region,
-        pcpl_city,
-        pcpl_type,
-        bene_inn,
-        bene_name,
-        bene_region,
-        bene_city,
-        bene_type,
-        issue_date,
-        start_date,
-        end_date,
-        end_date_fallback,
-        sum_summary,
-        sum_lower,
-        currency_label,
-        ikz,
-        coverage_type,
-        guarantee_number,
+    # Assemble table: every part has at most one row per (id, run_id), so aligning them
+    # on a shared index gives the same result as a chain of left merges.
+    wide_index = pd.MultiIndex.from_frame(base_df)
+    parts = [
         published_time,
         redaction_type,
         guarantee_number_doc,
-    ]:
-        wide = wide.merge(part, on=["id", "run_id"], how="left")
-
-    wide = wide.merge(
         selected_files[["id", "run_id", "stored_filename", "stored_path", "sha256"]],
-        on=["id", "run_id"],
-        how="left",
-    )
+    ]
+    wide = pd.concat(
+        [
+            extracted.reindex(
+                index=wide_index, columns=[column for column, *_ in attribute_targets]
+            ),
+            *[part.set_index(["id", "run_id"]).reindex(wide_index) for part in parts],
+        ],
+        axis=1,
+    ).reset_index()
 
     # Coalesce guarantee number from summary and document metadata
     wide["guarantee_number"] = wide["guarantee_number"].fillna(wide["guarantee_number_doc"])
@@ -392,51 +548,60 @@ def main() -> None:
     def normalize_text(series: pd.Series) -> pd.Series:
         return (
             series.astype(str)
-            .str.replace(r"\s+", " ", regex=True)
+            .str.replace(WHITESPACE_RE, " ", regex=True)
             .str.strip()
             .replace("nan", pd.NA)
         )
 
     def normalize_okopf(series: pd.Series) -> pd.Series:
         s = normalize_text(series)
-        extracted = s.str.extract(r"\(([^()]*)\)\s*$", expand=False)
-        base = s.str.replace(r"\s*\([^)]*\)\s*$", "", regex=True).str.strip()
+        extracted = s.str.extract(OKOPF_CODE_RE, expand=False)
+        base = s.str.replace(TRAILING_PARENS_RE, "", regex=True).str.strip()
         out = base.where(extracted.isna(), base + " (" + extracted + ")")
         return out.replace("", pd.NA)
 
     def strip_parens(series: pd.Series) -> pd.Series:
         return (
             normalize_text(series)
-            .str.replace(r"\s*\([^)]*\)\s*$", "", regex=True)
+            .str.replace(TRAILING_PARENS_RE, "", regex=True)
             .replace("", pd.NA)
         )
 
     def parse_number(series: pd.Series) -> pd.Series:
         cleaned = (
             normalize_text(series)
-            .str.replace(r"[^0-9,.-]", "", regex=True)
+            .str.replace(NON_NUMERIC_RE, "", regex=True)
             .str.replace(",", ".", regex=False)
         )
         return pd.to_numeric(cleaned, errors="coerce")
 
+    def to_datetime_dayfirst(s: pd.Series, fmt: str) -> pd.Series:
+        # EIS uses one fixed layout; only values that do not match it go through the slow
+        # per-element dateutil parser.
+        dt = pd.to_datetime(s, format=fmt, errors="coerce")
+        rest = dt.isna() & s.notna()
+        if rest.any():
+            dt = dt.fillna(pd.to_datetime(s[rest], format="mixed", dayfirst=True, errors="coerce"))
+        return dt
+
     def parse_date(series: pd.Series) -> pd.Series:
-        s = normalize_text(series).str.replace(r"\(.*?\)", "", regex=True).str.strip()
-        return pd.to_datetime(s, dayfirst=True, errors="coerce").dt.date
+        s = normalize_text(series).str.replace(PARENS_RE, "", regex=True).str.strip()
+        return to_datetime_dayfirst(s, "%d.%m.%Y").dt.date
 
     def parse_datetime_msk(series: pd.Series) -> pd.Series:
-        s = normalize_text(series).str.replace(r"\(.*?\)", "", regex=True).str.strip()
-        dt = pd.to_datetime(s, dayfirst=True, errors="coerce")
+        s = normalize_text(series).str.replace(PARENS_RE, "", regex=True).str.strip()
+        dt = to_datetime_dayfirst(s, "%d.%m.%Y %H:%M")
         if dt.dt.tz is None:
             dt = dt.dt.tz_localize("Europe/Moscow")
         return dt
 
     # Currency extraction
     wide["currency_symbol"] = normalize_text(wide["sum_summary"]).str.extract(
-        r"([A-Za-zА-Яа-я₽$€]+)$", expand=False
+        CURRENCY_SYMBOL_RE, expand=False
     )
     wide["currency_from_label"] = normalize_text(wide["currency_from_label"])
     wide["currency_from_value"] = normalize_text(wide["sum_lower"]).str.extract(
-        r"ОКВ\s*(\d+)", expand=False
+        CURRENCY_CODE_RE, expand=False
     )
 
     # Numeric amounts
@@ -467,8 +632,12 @@ def main() -> None:
     output_dir.mkdir(parents=True, exist_ok=True)
     out_csv = output_dir / "wide_analytical_latest.csv"
     out_parquet = output_dir / "wide_analytical_latest.parquet"
-    wide.to_csv(out_csv, index=False)
-    wide.to_parquet(out_parquet, index=False)
+    # Convert once and let Arrow's C++ writers produce both files. The pandas metadata is
+    # dropped so notebooks read the parquet back with default dtypes rather than the
+    # Arrow-backed ones used above.
+    table = pa.Table.from_pandas(wide, preserve_index=False).replace_schema_metadata(None)
+    pq.write_table(table, out_parquet, compression="zstd")
+    pa_csv.write_csv(table, out_csv)
 
     print("Latest run_id:", run_id)
     print("Selected files rows", len(selected_files))
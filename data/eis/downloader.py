@@ -1,16 +1,42 @@
 from __future__ import annotations
 
 import hashlib
+import logging
 import mimetypes
+import os
 import shutil
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
+import requests
 from pypdf import PdfReader
 from selenium.common.exceptions import NoSuchWindowException, WebDriverException
 from selenium.webdriver.remote.webdriver import WebDriver
 
+from .http_client import copy_driver_cookies
+from .selenium_client import DownloadEvents
+from .storage import load_meta_cache, save_meta_cache
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # optional, Linux only; waiters fall back to timed polling
+    INotify = None
+
+try:
+    from pypdf._reader import logger as pypdf_logger
+
+    # Malformed-but-readable PDFs are common; set once instead of on every page count.
+    pypdf_logger.setLevel(logging.ERROR)
+except Exception:
+    pass
+
+
+HTTP_DOWNLOAD_WORKERS = 4
+DIGEST_WORKERS = 4
+
 
 def clean_download_dir(download_dir: Path) -> None:
     download_dir.mkdir(parents=True, exist_ok=True)
@@ -19,24 +45,45 @@ def clean_download_dir(download_dir: Path) -> None:
             path.unlink()
 
 
+# Formats EIS attachments actually come in. A fixed table also keeps mime_type independent
+# of the host's mime.types; anything else still goes through mimetypes.
+_SUFFIX_MIME = {
+    ".pdf": "application/pdf",
+    ".doc": "application/msword",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".xls": "application/vnd.ms-excel",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".rtf": "application/rtf",
+    ".zip": "application/zip",
+    ".rar": "application/vnd.rar",
+    ".sig": "application/pgp-signature",
+    ".p7s": "application/pkcs7-signature",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".tif": "image/tiff",
+    ".tiff": "image/tiff",
+}
+
+
+@lru_cache(maxsize=1024)
+def _mime_for_suffix(suffix: str) -> str:
+    return mimetypes.guess_type(f"file{suffix}")[0] or ""
+
+
+def guess_mime_type(filename: str) -> str:
+    suffix = os.path.splitext(filename)[1].lower()
+    return _SUFFIX_MIME.get(suffix) or _mime_for_suffix(suffix)
+
+
 def sha256_file(path: Path) -> str:
-    hasher = hashlib.sha256()
-    with path.open("rb") as handle:
-        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
-            hasher.update(chunk)
-    return hasher.hexdigest()
+    with path.open("rb", buffering=1024 * 1024) as handle:
+        return hashlib.file_digest(handle, "sha256").hexdigest()
 
 
 def pdf_page_count(path: Path, retries: int = 3, delay_seconds: float = 1.0) -> int:
     if path.suffix.lower() != ".pdf":
         return 0
-    try:
-        from pypdf._reader import logger as pypdf_logger
-        import logging
-
-        pypdf_logger.setLevel(logging.ERROR)
-    except Exception:
-        pass
 
     last_error: Exception | None = None
     for _ in range(max(1, retries)):
@@ -50,6 +97,27 @@ def pdf_page_count(path: Path, retries: int = 3, delay_seconds: float = 1.0) ->
     return 0
 
 
+def _cached_digest(
+    path: Path, cache: Dict[str, Dict[str, Any]], sha256: Optional[str] = None
+) -> Tuple[str, int, bool]:
+    # Returns (sha256, page_count, recomputed); unchanged files are only stat()ed.
+    # A sha256 computed while streaming the download skips re-reading the file.
+    stat = path.stat()
+    entry = cache.get(path.name)
+    if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+        return entry["sha256"], entry["page_count"], False
+    if sha256 is None:
+        sha256 = sha256_file(path)
+    page_count = pdf_page_count(path)
+    cache[path.name] = {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": sha256,
+        "page_count": page_count,
+    }
+    return sha256, page_count, True
+
+
 def _open_download(driver: WebDriver, url: str) -> tuple[str, Optional[str]]:
     main_handle = driver.current_window_handle
     before_handles = set(driver.window_handles)
@@ -84,20 +152,76 @@ def _close_download_tab(driver: WebDriver, main_handle: str, download_handle: Op
             driver.switch_to.window(handles[0])
 
 
+# Runs the same checks on the head of the serialized DOM inside the browser, so only a
+# short status string crosses the WebDriver connection instead of the full page source.
+_ERROR_PROBE_JS = """
+const root = document.documentElement;
+const head = root ? root.outerHTML.slice(0, 65536) : "";
+if ((head.includes("File with uid") && head.includes("not found"))
+    || (head.includes("Файл с uid") && head.includes("не найден"))) {
+  return "FAILED_NOT_FOUND";
+}
+if (head.includes('status":"ERROR"')) {
+  return "FAILED_ERROR_PAGE";
+}
+return "";
+"""
+
+
 def _detect_download_error(driver: WebDriver, download_handle: Optional[str]) -> str:
     try:
         if download_handle:
             driver.switch_to.window(download_handle)
-        source = driver.page_source or ""
-        if ("File with uid" in source and "not found" in source) or (
-            "Файл с uid" in source and "не найден" in source
-        ):
-            return "FAILED_NOT_FOUND"
-        if "\"status\":\"ERROR\"" in source or "status\":\"ERROR\"" in source:
-            return "FAILED_ERROR_PAGE"
+        return driver.execute_script(_ERROR_PROBE_JS) or ""
     except (NoSuchWindowException, WebDriverException):
         return ""
-    return ""
+
+
+def _file_names(directory: Path) -> Set[str]:
+    with os.scandir(directory) as entries:
+        return {entry.name for entry in entries if entry.is_file(follow_symlinks=False)}
+
+
+def _scan_new_files(download_dir: Path, before: Set[str]) -> List[Tuple[str, os.stat_result]]:
+    # One scandir pass; size and mtime come from the same stat per file.
+    new_files = []
+    with os.scandir(download_dir) as entries:
+        for entry in entries:
+            if entry.name in before:
+                continue
+            try:
+                if entry.is_file(follow_symlinks=False):
+                    new_files.append((entry.name, entry.stat(follow_symlinks=False)))
+            except FileNotFoundError:
+                # Renamed away (.crdownload -> final name) between listing and stat.
+                continue
+    return new_files
+
+
+def _watch_download_dir(download_dir: Path) -> Optional["INotify"]:
+    if INotify is None:
+        return None
+    try:
+        watch = INotify()
+        # No IN_MODIFY: it fires on every chunk Chrome writes and would turn the wait into a
+        # busy loop; sizes are still sampled on each wake-up.
+        watch.add_watch(
+            str(download_dir),
+            inotify_flags.CREATE | inotify_flags.MOVED_TO | inotify_flags.CLOSE_WRITE,
+        )
+        return watch
+    except OSError:
+        return None
+
+
+def _wait_for_dir_events(watch: Optional["INotify"], seconds: float) -> Set[str]:
+    # Names that were finished (renamed into place or closed after writing) while waiting.
+    if watch is None:
+        time.sleep(seconds)
+        return set()
+    events = watch.read(timeout=int(seconds * 1000))
+    finished = inotify_flags.MOVED_TO | inotify_flags.CLOSE_WRITE
+    return {event.name for event in events if event.mask & finished}
 
 
 def _wait_for_new_file(
@@ -109,38 +233,52 @@ def _wait_for_new_file(
 ) -> Optional[Path]:
     deadline = time.time() + timeout
     progress: Dict[str, Dict[str, float]] = {}
-    while time.time() < deadline:
-        current_files = [p for p in download_dir.iterdir() if p.is_file()]
-        new_files = [p for p in current_files if p.name not in before]
-        completed = [p for p in new_files if not p.name.endswith(".crdownload")]
-        in_progress = [p for p in new_files if p.name.endswith(".crdownload")]
-
-        for path in new_files:
-            size = path.stat().st_size
-            entry = progress.get(path.name, {"size": -1, "last_change": time.time()})
-            if size != entry["size"]:
-                entry["size"] = size
-                entry["last_change"] = time.time()
-                progress[path.name] = entry
-
-        if completed:
-            latest = max(completed, key=lambda p: p.stat().st_mtime)
-            entry = progress.get(latest.name, {"last_change": time.time()})
-            if time.time() - entry["last_change"] >= stable_seconds:
-                return latest
-
-        if in_progress:
-            latest_cr = max(in_progress, key=lambda p: p.stat().st_mtime)
-            entry = progress.get(latest_cr.name, {"last_change": time.time()})
-            if time.time() - entry["last_change"] >= stall_seconds:
-                try:
-                    latest_cr.unlink()
-                except OSError:
-                    pass
-                return None
-
-        time.sleep(1)
-    return None
+    finished: Set[str] = set()
+    idle_ticks = 0
+    watch = _watch_download_dir(download_dir)
+    try:
+        while time.time() < deadline:
+            new_files = _scan_new_files(download_dir, before)
+            completed = [item for item in new_files if not item[0].endswith(".crdownload")]
+            in_progress = [item for item in new_files if item[0].endswith(".crdownload")]
+
+            changed = False
+            for name, stat in new_files:
+                entry = progress.get(name, {"size": -1, "last_change": time.time()})
+                if stat.st_size != entry["size"]:
+                    entry["size"] = stat.st_size
+                    entry["last_change"] = time.time()
+                    progress[name] = entry
+                    changed = True
+            # Poll quickly while files appear or grow, back off to 2s while nothing moves.
+            idle_ticks = 0 if changed else idle_ticks + 1
+            poll_seconds = min(2.0, 0.2 * (1 << min(idle_ticks, 4)))
+
+            if completed:
+                name = max(completed, key=lambda item: item[1].st_mtime)[0]
+                latest = download_dir / name
+                entry = progress.get(name, {"last_change": time.time()})
+                # A close/rename event means Chrome is done with the file; no need to wait
+                # for the size to settle.
+                if name in finished or time.time() - entry["last_change"] >= stable_seconds:
+                    return latest
+
+            if in_progress:
+                name = max(in_progress, key=lambda item: item[1].st_mtime)[0]
+                latest_cr = download_dir / name
+                entry = progress.get(name, {"last_change": time.time()})
+                if time.time() - entry["last_change"] >= stall_seconds:
+                    try:
+                        latest_cr.unlink()
+                    except OSError:
+                        pass
+                    return None
+
+            finished |= _wait_for_dir_events(watch, poll_seconds)
+        return None
+    finally:
+        if watch is not None:
+            watch.close()
 
 
 def _wait_for_download_result(
@@ -151,46 +289,143 @@ def _wait_for_download_result(
     timeout: int = 120,
     stable_seconds: int = 3,
     stall_seconds: int = 30,
+    events: Optional[DownloadEvents] = None,
+    events_mark: int = 0,
 ) -> tuple[Optional[Path], str]:
     deadline = time.time() + timeout
     progress: Dict[str, Dict[str, float]] = {}
-    while time.time() < deadline:
-        error_status = _detect_download_error(driver, download_handle)
-        if error_status:
-            return None, error_status
-
-        current_files = [p for p in download_dir.iterdir() if p.is_file()]
-        new_files = [p for p in current_files if p.name not in before]
-        completed = [p for p in new_files if not p.name.endswith(".crdownload")]
-        in_progress = [p for p in new_files if p.name.endswith(".crdownload")]
-
-        for path in new_files:
-            size = path.stat().st_size
-            entry = progress.get(path.name, {"size": -1, "last_change": time.time()})
-            if size != entry["size"]:
-                entry["size"] = size
-                entry["last_change"] = time.time()
-                progress[path.name] = entry
-
-        if completed:
-            latest = max(completed, key=lambda p: p.stat().st_mtime)
-            entry = progress.get(latest.name, {"last_change": time.time()})
-            if time.time() - entry["last_change"] >= stable_seconds:
-                return latest, ""
-
-        if in_progress:
-            latest_cr = max(in_progress, key=lambda p: p.stat().st_mtime)
-            entry = progress.get(latest_cr.name, {"last_change": time.time()})
-            if time.time() - entry["last_change"] >= stall_seconds:
-                try:
-                    latest_cr.unlink()
-                except OSError:
-                    pass
-                return None, "FAILED_STALLED"
-
-        time.sleep(1)
-
-    return None, "FAILED_TIMEOUT"
+    finished: Set[str] = set()
+    # With browser download events the directory scan below only covers stalls.
+    watch = _watch_download_dir(download_dir) if events is None else None
+    idle_ticks = 0
+    try:
+        while time.time() < deadline:
+            error_status = _detect_download_error(driver, download_handle)
+            if error_status:
+                return None, error_status
+
+            new_files = _scan_new_files(download_dir, before)
+            completed = [item for item in new_files if not item[0].endswith(".crdownload")]
+            in_progress = [item for item in new_files if item[0].endswith(".crdownload")]
+
+            changed = False
+            for name, stat in new_files:
+                entry = progress.get(name, {"size": -1, "last_change": time.time()})
+                if stat.st_size != entry["size"]:
+                    entry["size"] = stat.st_size
+                    entry["last_change"] = time.time()
+                    progress[name] = entry
+                    changed = True
+            # Poll quickly while files appear or grow, back off to 2s while nothing moves.
+            idle_ticks = 0 if changed else idle_ticks + 1
+            poll_seconds = min(2.0, 0.2 * (1 << min(idle_ticks, 4)))
+
+            if completed:
+                name = max(completed, key=lambda item: item[1].st_mtime)[0]
+                latest = download_dir / name
+                entry = progress.get(name, {"last_change": time.time()})
+                # A close/rename event means Chrome is done with the file; no need to wait
+                # for the size to settle.
+                if name in finished or time.time() - entry["last_change"] >= stable_seconds:
+                    return latest, ""
+
+            if in_progress:
+                name = max(in_progress, key=lambda item: item[1].st_mtime)[0]
+                latest_cr = download_dir / name
+                entry = progress.get(name, {"last_change": time.time()})
+                if time.time() - entry["last_change"] >= stall_seconds:
+                    try:
+                        latest_cr.unlink()
+                    except OSError:
+                        pass
+                    return None, "FAILED_STALLED"
+
+            if events is None:
+                finished |= _wait_for_dir_events(watch, poll_seconds)
+                continue
+            ended = events.wait(events_mark, poll_seconds)
+            if ended is None:
+                continue
+            status, filepath = ended
+            if status == "complete" and filepath and os.path.isfile(filepath):
+                return Path(filepath), ""
+            if status == "canceled":
+                return None, "FAILED_CANCELED"
+            # Not a usable event (e.g. no filepath reported); keep scanning the directory.
+            events_mark += 1
+
+        return None, "FAILED_TIMEOUT"
+    finally:
+        if watch is not None:
+            watch.close()
+
+
+def _http_download(
+    session: requests.Session,
+    url: str,
+    target: Path,
+    timeout: int,
+    stall_seconds: int,
+) -> Optional[str]:
+    # Direct file links only; HTML/JSON responses are error or interstitial
+    # pages that the Selenium path knows how to classify. Returns the sha256 of
+    # the stored file, hashed chunk by chunk as it streams in, or None on failure.
+    if timeout <= 0:
+        # The per-ID deadline has passed; requests rejects a zero timeout outright.
+        return None
+    deadline = time.monotonic() + timeout
+    digest = hashlib.sha256()
+    partial = target.with_name(target.name + ".part")
+    try:
+        with session.get(
+            url, stream=True, timeout=(min(30, timeout), stall_seconds)
+        ) as response:
+            if response.status_code >= 400:
+                return None
+            content_type = response.headers.get("Content-Type", "").lower()
+            if "text/html" in content_type or "application/json" in content_type:
+                return None
+            with partial.open("wb") as handle:
+                for chunk in response.iter_content(chunk_size=1024 * 1024):
+                    handle.write(chunk)
+                    digest.update(chunk)
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"Download exceeded {timeout}s")
+        os.replace(partial, target)
+        return digest.hexdigest()
+    except (requests.RequestException, OSError):
+        try:
+            partial.unlink()
+        except OSError:
+            pass
+        return None
+
+
+def _start_http_downloads(
+    http_pool: ThreadPoolExecutor,
+    session: requests.Session,
+    attachments: List[Dict[str, str]],
+    guarantee_id: int,
+    id_dir: Path,
+    force: bool,
+    timeout: int,
+    stall_seconds: int,
+) -> Dict[int, Future]:
+    # All direct downloads of one guarantee run concurrently; the browser loop below
+    # only handles the ones that come back None. Without a known suffix the browser
+    # download is still needed to learn the real file extension.
+    futures: Dict[int, Future] = {}
+    for index, item in enumerate(attachments, start=1):
+        original_name = (item.get("original_filename") or "").strip()
+        download_url = (item.get("download_url") or "").strip()
+        suffix = Path(original_name).suffix if original_name else ""
+        stored_path = id_dir / f"{guarantee_id}_{index}{suffix}"
+        if not suffix or not download_url or (stored_path.exists() and not force):
+            continue
+        futures[index] = http_pool.submit(
+            _http_download, session, download_url, stored_path, timeout, stall_seconds
+        )
+    return futures
 
 
 def download_attachments(
@@ -201,129 +436,153 @@ def download_attachments(
     attachments_root: Path,
     download_dir: Path,
     force: bool,
+    digest_pool: ThreadPoolExecutor,
     timeout: int = 180,
     stall_seconds: int = 30,
+    session: Optional[requests.Session] = None,
+    http_pool: Optional[ThreadPoolExecutor] = None,
+    download_events: Optional[DownloadEvents] = None,
 ) -> List[Dict[str, str]]:
     results: List[Dict[str, str]] = []
     id_dir = attachments_root / str(guarantee_id)
     id_dir.mkdir(parents=True, exist_ok=True)
+    meta_cache = load_meta_cache(id_dir)
+    meta_cache_dirty = False
+    # Hashing and page counting run on the worker's digest pool while the browser fetches
+    # the next attachment; sha256/page_count are filled into the rows once the loop is done.
+    pending: List[Tuple[Dict[str, Any], Future]] = []
+    http_downloads: Dict[int, Future] = {}
 
-    for index, item in enumerate(attachments, start=1):
-        original_name = (item.get("original_filename") or "").strip()
-        download_url = (item.get("download_url") or "").strip()
-        document_index = item.get("document_index")
-        document_number = item.get("document_number", "")
-
-        suffix = Path(original_name).suffix if original_name else ""
-        stored_filename = f"{guarantee_id}_{index}{suffix}"
-        stored_path = id_dir / stored_filename
-
-        if stored_path.exists() and not force:
-            results.append(
-                {
-                    "run_id": run_id,
-                    "id": guarantee_id,
-                    "file_index": index,
-                    "stored_filename": stored_filename,
-                    "stored_path": str(stored_path),
-                    "original_filename": original_name,
-                    "download_url": download_url,
-                    "document_index": document_index,
-                    "document_number": document_number,
-                    "page_count": pdf_page_count(stored_path),
-                    "mime_type": mimetypes.guess_type(stored_filename)[0] or "",
-                    "download_status": "SKIPPED_EXISTS",
-                    "sha256": sha256_file(stored_path),
-                }
-            )
-            continue
-
-        before_files = {p.name for p in download_dir.iterdir() if p.is_file()}
-        main_handle, download_handle = _open_download(driver, download_url)
-        immediate_error = _detect_download_error(driver, download_handle)
-        if immediate_error:
-            _close_download_tab(driver, main_handle, download_handle)
-            results.append(
-                {
-                    "run_id": run_id,
-                    "id": guarantee_id,
-                    "file_index": index,
-                    "stored_filename": "",
-                    "stored_path": "",
-                    "original_filename": original_name,
-                    "download_url": download_url,
-                    "document_index": document_index,
-                    "document_number": document_number,
-                    "page_count": 0,
-                    "mime_type": "",
-                    "download_status": immediate_error,
-                    "sha256": "",
-                }
+    try:
+        if session is not None and http_pool is not None:
+            if driver is not None:
+                copy_driver_cookies(session, driver)
+            http_downloads = _start_http_downloads(
+                http_pool, session, attachments, guarantee_id, id_dir, force, timeout, stall_seconds
             )
-            continue
-        downloaded, error_status = _wait_for_download_result(
-            driver,
-            download_handle,
-            download_dir,
-            before_files,
-            timeout=timeout,
-            stall_seconds=stall_seconds,
-        )
 
-        if downloaded is None:
-            _close_download_tab(driver, main_handle, download_handle)
-            results.append(
-                {
-                    "run_id": run_id,
-                    "id": guarantee_id,
-                    "file_index": index,
-                    "stored_filename": "",
-                    "stored_path": "",
-                    "original_filename": original_name,
-                    "download_url": download_url,
-                    "document_index": document_index,
-                    "document_number": document_number,
-                    "page_count": 0,
-                    "mime_type": "",
-                    "download_status": error_status or "FAILED_TIMEOUT",
-                    "sha256": "",
-                }
-            )
-            continue
+        for index, item in enumerate(attachments, start=1):
+            original_name = (item.get("original_filename") or "").strip()
+            download_url = (item.get("download_url") or "").strip()
+            document_index = item.get("document_index")
+            document_number = item.get("document_number", "")
 
-        if not suffix and downloaded.suffix:
-            stored_filename = f"{guarantee_id}_{index}{downloaded.suffix}"
+            suffix = Path(original_name).suffix if original_name else ""
+            stored_filename = f"{guarantee_id}_{index}{suffix}"
             stored_path = id_dir / stored_filename
 
-        if force and stored_path.exists():
-            stored_path.unlink()
-
-        stored_path.parent.mkdir(parents=True, exist_ok=True)
-        shutil.move(str(downloaded), str(stored_path))
-        _close_download_tab(driver, main_handle, download_handle)
-        if not stored_path.exists() or stored_path.stat().st_size == 0:
-            results.append(
-                {
+            # Files fetched by the HTTP prefetch may already be on disk by now.
+            if index not in http_downloads and stored_path.exists() and not force:
+                row = {
                     "run_id": run_id,
                     "id": guarantee_id,
                     "file_index": index,
-                    "stored_filename": "",
-                    "stored_path": "",
+                    "stored_filename": stored_filename,
+                    "stored_path": str(stored_path),
                     "original_filename": original_name,
                     "download_url": download_url,
                     "document_index": document_index,
                     "document_number": document_number,
                     "page_count": 0,
-                    "mime_type": "",
-                    "download_status": "FAILED_MISSING",
+                    "mime_type": guess_mime_type(stored_filename),
+                    "download_status": "SKIPPED_EXISTS",
                     "sha256": "",
                 }
-            )
-            continue
-
-        mime_type = mimetypes.guess_type(stored_path.name)[0] or ""
-        results.append(
-            {
+                results.append(row)
+                pending.append((row, digest_pool.submit(_cached_digest, stored_path, meta_cache)))
+                continue
+
+            http_download = http_downloads.get(index)
+            streamed_sha256 = http_download.result() if http_download is not None else None
+            if streamed_sha256 is None:
+                before_files = _file_names(download_dir)
+                events_mark = download_events.mark() if download_events is not None else 0
+                main_handle, download_handle = _open_download(driver, download_url)
+                immediate_error = _detect_download_error(driver, download_handle)
+                if immediate_error:
+                    _close_download_tab(driver, main_handle, download_handle)
+                    results.append(
+                        {
+                            "run_id": run_id,
+                            "id": guarantee_id,
+                            "file_index": index,
+                            "stored_filename": "",
+                            "stored_path": "",
+                            "original_filename": original_name,
+                            "download_url": download_url,
+                            "document_index": document_index,
+                            "document_number": document_number,
+                            "page_count": 0,
+                            "mime_type": "",
+                            "download_status": immediate_error,
+                            "sha256": "",
+                        }
+                    )
+                    continue
+                downloaded, error_status = _wait_for_download_result(
+                    driver,
+                    download_handle,
+                    download_dir,
+                    before_files,
+                    timeout=timeout,
+                    stall_seconds=stall_seconds,
+                    events=download_events,
+                    events_mark=events_mark,
+                )
+
+                if downloaded is None:
+                    _close_download_tab(driver, main_handle, download_handle)
+                    results.append(
+                        {
+                            "run_id": run_id,
+                            "id": guarantee_id,
+                            "file_index": index,
+                            "stored_filename": "",
+                            "stored_path": "",
+                            "original_filename": original_name,
+                            "download_url": download_url,
+                            "document_index": document_index,
+                            "document_number": document_number,
+                            "page_count": 0,
+                            "mime_type": "",
+                            "download_status": error_status or "FAILED_TIMEOUT",
+                            "sha256": "",
+                        }
+                    )
+                    continue
+
+                if not suffix and downloaded.suffix:
+                    stored_filename = f"{guarantee_id}_{index}{downloaded.suffix}"
+                    stored_path = id_dir / stored_filename
+
+                if force and stored_path.exists():
+                    stored_path.unlink()
+
+                stored_path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(downloaded), str(stored_path))
+                _close_download_tab(driver, main_handle, download_handle)
+
+            if not stored_path.exists() or stored_path.stat().st_size == 0:
+                results.append(
+                    {
+                        "run_id": run_id,
+                        "id": guarantee_id,
+                        "file_index": index,
+                        "stored_filename": "",
+                        "stored_path": "",
+                        "original_filename": original_name,
+                        "download_url": download_url,
+                        "document_index": document_index,
+                        "document_number": document_number,
+                        "page_count": 0,
+                        "mime_type": "",
+                        "download_status": "FAILED_MISSING",
+                        "sha256": "",
+                    }
+                )
+                continue
+
+            row = {
                 "run_id": run_id,
                 "id": guarantee_id,
                 "file_index": index,
@@ -333,11 +592,25 @@ def download_attachments(
                 "download_url": download_url,
                 "document_index": document_index,
                 "document_number": document_number,
-                "page_count": pdf_page_count(stored_path),
-                "mime_type": mime_type,
+                "page_count": 0,
+                "mime_type": guess_mime_type(stored_path.name),
                 "download_status": "DOWNLOADED",
-                "sha256": sha256_file(stored_path),
+                "sha256": "",
             }
-        )
+            results.append(row)
+            pending.append(
+                (row, digest_pool.submit(_cached_digest, stored_path, meta_cache, streamed_sha256))
+            )
+
+        for row, future in pending:
+            row["sha256"], row["page_count"], recomputed = future.result()
+            meta_cache_dirty |= recomputed
+    finally:
+        # The pools outlive this call; prefetches for a guarantee that failed midway
+        # must not keep running into the next one.
+        for http_download in http_downloads.values():
+            http_download.cancel()
 
+    if meta_cache_dirty:
+        save_meta_cache(id_dir, meta_cache)
     return results
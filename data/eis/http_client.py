@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+from urllib3.util.retry import Retry
+
+from .config import USER_AGENT
+
+
+def build_http_session(pool_size: int = 4) -> requests.Session:
+    # One session per worker: card pages and attachments share kept-alive
+    # connections to the same host instead of a new TCP/TLS handshake per ID.
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(connect=2, read=0, backoff_factor=0.5),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(
+        {
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.8",
+        }
+    )
+    return session
+
+
+def copy_driver_cookies(session: requests.Session, driver: WebDriver) -> None:
+    # Attachment links may need the browser's session cookies to resolve.
+    try:
+        cookies = driver.get_cookies()
+    except WebDriverException:
+        return
+    for cookie in cookies:
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+        )
+
+
+def fetch_html(session: requests.Session, url: str, timeout: float) -> Optional[str]:
+    if timeout <= 0:
+        return None
+    try:
+        response = session.get(url, timeout=timeout)
+    except requests.RequestException:
+        return None
+    if response.status_code >= 400:
+        return None
+    # EIS does not always declare a charset; requests would fall back to latin-1.
+    if "charset" not in response.headers.get("Content-Type", "").lower():
+        response.encoding = "utf-8"
+    return response.text
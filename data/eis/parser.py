@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import re
+from html import unescape
 from typing import Dict, List, Tuple
 
 from bs4 import BeautifulSoup
@@ -13,12 +14,18 @@ from .config import (
     TARGET_SECTIONS,
 )
 
-_WHITESPACE_RE = re.compile(r"\s+")
+_TARGET_SECTION_SET = frozenset(TARGET_SECTIONS)
+# The "page does not exist" stub is a ~2 KB document with the phrase near its top; real
+# cards are hundreds of KB, so only their head is worth scanning.
+_MISSING_PAGE_SCAN_CHARS = 32768
+_DOC_NUM_RE = re.compile(r"№\s*([\w\-/]+)")
+_TAG_RE = re.compile(r"<[^>]*>")
 
 
 def _normalize_whitespace(text: str) -> str:
-    cleaned = (text or "").replace("\xa0", " ")
-    return _WHITESPACE_RE.sub(" ", cleaned).strip()
+    # str.split() uses the same Unicode whitespace set as regex \s (including \xa0), so
+    # this equals a re.sub(r"\s+", " ") collapse plus strip, without the regex engine.
+    return " ".join((text or "").split())
 
 
 def normalize_label(text: str) -> str:
@@ -34,11 +41,11 @@ def extract_text_value(element) -> str:
     if element is None:
         return ""
     # Preserve raw text as much as possible while trimming outer whitespace.
-    return normalize_value("".join(element.strings))
+    return normalize_value(element.get_text())
 
 
 def is_missing_page(html: str) -> bool:
-    return MISSING_PAGE_PHRASE in html
+    return MISSING_PAGE_PHRASE in html[:_MISSING_PAGE_SCAN_CHARS]
 
 
 def _parse_main_info(soup: BeautifulSoup) -> Tuple[Dict[str, str], List[str]]:
@@ -130,7 +137,7 @@ def parse_general_info(html: str) -> Tuple[Dict[str, Dict[str, str]], List[str]]
 
     for header in soup.find_all("h2", class_="blockInfo__title"):
         section_name = _normalize_whitespace(header.get_text(" ", strip=True))
-        if section_name not in TARGET_SECTIONS:
+        if section_name not in _TARGET_SECTION_SET:
             continue
 
         container = header.parent
@@ -179,11 +186,12 @@ def _extract_tooltip_text(link) -> str:
     tooltip = link.get("data-tooltip")
     if not tooltip:
         return ""
-    try:
-        tooltip_soup = BeautifulSoup(tooltip, "html.parser")
-        return _normalize_whitespace(tooltip_soup.get_text(" ", strip=True))
-    except Exception:
-        return ""
+    # Tooltips are a single <span> around the file name; stripping the tags and then
+    # decoding entities gives the same text as get_text(" ", strip=True) on a parsed
+    # fragment, without building a soup per link.
+    if "<" in tooltip:
+        tooltip = _TAG_RE.sub(" ", tooltip)
+    return _normalize_whitespace(unescape(tooltip))
 
 
 def _extract_document_number(attachment) -> str:
@@ -199,16 +207,22 @@ def _extract_document_number(attachment) -> str:
         after = text.split("№", 1)[1].strip()
         if after:
             return after.split(" ")[0]
-    match = re.search(r"№\s*([\\w\\-\\/]+)", text)
+    match = _DOC_NUM_RE.search(text)
     if match:
         return match.group(1)
     return ""
 
 
-def _parse_document_metadata_rows(soup: BeautifulSoup) -> List[Dict[str, str]]:
-    rows: List[Dict[str, str]] = []
-    blocks = soup.find_all("div", class_="card-attachments__block")
-    for block in blocks:
+def _walk_guarantee_blocks(
+    soup: BeautifulSoup,
+) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    # One pass over the guarantee document blocks yields both the attachment links and
+    # the per-document metadata rows.
+    attachments: List[Dict[str, str]] = []
+    metadata_rows: List[Dict[str, str]] = []
+    seen: set[tuple[int, str]] = set()
+
+    for block in soup.find_all("div", class_="card-attachments__block"):
         title = block.find("div", class_="title")
         if not title:
             continue
@@ -216,16 +230,16 @@ def _parse_document_metadata_rows(soup: BeautifulSoup) -> List[Dict[str, str]]:
         if title_text != "Информация о банковской гарантии":
             continue
 
-        attachments = block.find_all("div", class_="attachment")
-        for index, attachment in enumerate(attachments, start=1):
+        for index, attachment in enumerate(block.find_all("div", class_="attachment"), start=1):
             document_number = _extract_document_number(attachment)
+            normalized_number = normalize_value(document_number) if document_number else ""
             if document_number:
-                rows.append(
+                metadata_rows.append(
                     {
                         "field_name": "Номер банковской гарантии",
-                        "field_value": normalize_value(document_number),
+                        "field_value": normalized_number,
                         "document_index": index,
-                        "document_number": normalize_value(document_number),
+                        "document_number": normalized_number,
                     }
                 )
 
@@ -234,43 +248,22 @@ def _parse_document_metadata_rows(soup: BeautifulSoup) -> List[Dict[str, str]]:
                 if not label or label == ATTACHMENTS_LABEL:
                     continue
                 value_div = label_div.find_next_sibling("div", class_="attachment__value")
-                rows.append(
+                metadata_rows.append(
                     {
                         "field_name": label,
                         "field_value": extract_text_value(value_div),
                         "document_index": index,
-                        "document_number": normalize_value(document_number) if document_number else "",
+                        "document_number": normalized_number,
                     }
                 )
 
-    return rows
-
-
-def parse_document_info(html: str) -> Tuple[List[Dict[str, str]], List[Dict[str, str]], List[str]]:
-    soup = BeautifulSoup(html, "html.parser")
-    warnings: List[str] = []
-    metadata_rows = _parse_document_metadata_rows(soup)
-    attachments: List[Dict[str, str]] = []
-    seen: set[tuple[int, str]] = set()
-
-    blocks = soup.find_all("div", class_="card-attachments__block")
-    for block in blocks:
-        title = block.find("div", class_="title")
-        if not title:
-            continue
-        title_text = _normalize_whitespace(title.get_text(" ", strip=True))
-        if title_text != "Информация о банковской гарантии":
-            continue
-
-        for doc_index, attachment in enumerate(block.find_all("div", class_="attachment"), start=1):
-            document_number = _extract_document_number(attachment)
             for link in attachment.find_all("a", href=True):
                 href = link["href"]
                 if "signview" in href:
                     continue
                 if not _is_download_link(href):
                     continue
-                key = (doc_index, href)
+                key = (index, href)
                 if key in seen:
                     continue
                 seen.add(key)
@@ -283,11 +276,19 @@ def parse_document_info(html: str) -> Tuple[List[Dict[str, str]], List[Dict[str,
                     {
                         "download_url": href,
                         "original_filename": original_name,
-                        "document_index": doc_index,
-                        "document_number": normalize_value(document_number) if document_number else "",
+                        "document_index": index,
+                        "document_number": normalized_number,
                     }
                 )
 
+    return attachments, metadata_rows
+
+
+def parse_document_info(html: str) -> Tuple[List[Dict[str, str]], List[Dict[str, str]], List[str]]:
+    soup = BeautifulSoup(html, "html.parser")
+    warnings: List[str] = []
+    attachments, metadata_rows = _walk_guarantee_blocks(soup)
+
     if not attachments:
         warnings.append("Attachments not found in document blocks")
 
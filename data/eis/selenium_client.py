@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import itertools
+import queue
 import random
+import threading
 import time
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -11,6 +15,15 @@ from selenium.webdriver.support.ui import WebDriverWait
 
 from .config import CHROMEDRIVER_PATH, USER_AGENT
 
+SLEEP_TABLE_SIZE = 1024
+
+_BASE_PREFS = {
+    "download.prompt_for_download": False,
+    "download.directory_upgrade": True,
+    "safebrowsing.enabled": True,
+    "plugins.always_open_pdf_externally": True,
+}
+
 
 def build_driver(
     download_dir: Path, headless: bool = False, block_images: bool = False
@@ -23,14 +36,10 @@ def build_driver(
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument(f"--user-agent={USER_AGENT}")
+    # WebDriver BiDi carries browsingContext.downloadEnd events; see DownloadEvents.
+    options.enable_bidi = True
 
-    prefs = {
-        "download.default_directory": str(download_dir),
-        "download.prompt_for_download": False,
-        "download.directory_upgrade": True,
-        "safebrowsing.enabled": True,
-        "plugins.always_open_pdf_externally": True,
-    }
+    prefs = {**_BASE_PREFS, "download.default_directory": str(download_dir)}
     if block_images:
         prefs["profile.managed_default_content_settings.images"] = 2
     options.add_experimental_option("prefs", prefs)
@@ -39,10 +48,140 @@ def build_driver(
     return webdriver.Chrome(service=service, options=options)
 
 
+class DownloadEvents:
+    # Download completions reported by the browser (BiDi browsingContext.downloadEnd), so
+    # waiters learn the final path without watching .crdownload renames.
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._ended: List[Tuple[str, str]] = []
+
+    @classmethod
+    def attach(cls, driver: webdriver.Chrome) -> Optional["DownloadEvents"]:
+        # None when the browser or chromedriver has no BiDi download events.
+        events = cls()
+        try:
+            driver.browsing_context.add_event_handler("download_end", events._on_end)
+        except Exception:
+            return None
+        return events
+
+    def mark(self) -> int:
+        with self._cond:
+            return len(self._ended)
+
+    def wait(self, since: int, timeout: float) -> Optional[Tuple[str, str]]:
+        # First (status, filepath) reported after mark() returned `since`.
+        with self._cond:
+            self._cond.wait_for(lambda: len(self._ended) > since, timeout)
+            return self._ended[since] if len(self._ended) > since else None
+
+    def _on_end(self, event: Any) -> None:
+        params = getattr(event, "download_params", None) or event
+        if isinstance(params, dict):
+            status, filepath = params.get("status"), params.get("filepath")
+        else:
+            status, filepath = getattr(params, "status", None), getattr(params, "filepath", None)
+        with self._cond:
+            self._ended.append((status or "", filepath or ""))
+            self._cond.notify_all()
+
+
+class DriverPool:
+    def __init__(
+        self,
+        download_root: Path,
+        spares: int = 1,
+        headless: bool = False,
+        block_images: bool = False,
+    ) -> None:
+        self.download_root = download_root
+        self.spares = max(0, spares)
+        self.headless = headless
+        self.block_images = block_images
+        self._idle: queue.Queue = queue.Queue()
+        self._tasks: queue.Queue = queue.Queue()
+        self._download_dirs: Dict[int, Path] = {}
+        self._download_events: Dict[int, Optional[DownloadEvents]] = {}
+        self._counter = itertools.count(1)
+        for _ in range(self.spares):
+            self._idle.put(self._build())
+        self._refill_thread = threading.Thread(target=self._refill_worker, daemon=True)
+        self._refill_thread.start()
+
+    def acquire(self) -> webdriver.Chrome:
+        try:
+            driver = self._idle.get_nowait()
+        except queue.Empty:
+            driver = self._build()
+        self._tasks.put(None)
+        return driver
+
+    def release(self, driver: webdriver.Chrome) -> None:
+        self._idle.put(driver)
+
+    def recycle(self, driver: Optional[webdriver.Chrome]) -> webdriver.Chrome:
+        # The dead driver is quit on the refill thread so the caller only pays
+        # for a pre-warmed replacement.
+        if driver is not None:
+            self._tasks.put(driver)
+        return self.acquire()
+
+    def download_dir(self, driver: webdriver.Chrome) -> Path:
+        return self._download_dirs[id(driver)]
+
+    def download_events(self, driver: webdriver.Chrome) -> Optional[DownloadEvents]:
+        return self._download_events.get(id(driver))
+
+    def close(self) -> None:
+        self._tasks.put(False)
+        self._refill_thread.join()
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(driver)
+
+    def _build(self) -> webdriver.Chrome:
+        download_dir = self.download_root / f"driver_{next(self._counter)}"
+        driver = build_driver(
+            download_dir=download_dir, headless=self.headless, block_images=self.block_images
+        )
+        self._download_dirs[id(driver)] = download_dir
+        self._download_events[id(driver)] = DownloadEvents.attach(driver)
+        return driver
+
+    def _quit(self, driver: webdriver.Chrome) -> None:
+        self._download_dirs.pop(id(driver), None)
+        self._download_events.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _refill_worker(self) -> None:
+        while True:
+            task = self._tasks.get()
+            if task is False:
+                return
+            if task is not None:
+                self._quit(task)
+            while self._idle.qsize() < self.spares:
+                try:
+                    self._idle.put(self._build())
+                except Exception:
+                    break
+
+
 def human_sleep(min_seconds: float, max_seconds: float) -> None:
     time.sleep(random.uniform(min_seconds, max_seconds))
 
 
+def sleep_table(min_seconds: float, max_seconds: float) -> List[float]:
+    # Index with `i & (SLEEP_TABLE_SIZE - 1)`; the size is a power of two.
+    return [random.uniform(min_seconds, max_seconds) for _ in range(SLEEP_TABLE_SIZE)]
+
+
 def wait_for_ready(driver: webdriver.Chrome, timeout: int = 30) -> None:
     WebDriverWait(driver, timeout).until(
         lambda d: d.execute_script("return document.readyState") == "complete"
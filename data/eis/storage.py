@@ -2,20 +2,85 @@ from __future__ import annotations
 
 import json
 import logging
+import os
+import queue
 import re
+import threading
+import time
 import uuid
+import warnings
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Set
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
 
-import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 from logging.handlers import RotatingFileHandler
 
 
+GUARANTEES_SCHEMA = pa.schema(
+    [
+        pa.field("run_id", pa.int64()),
+        pa.field("id", pa.int64()),
+        pa.field("status", pa.string()),
+        pa.field("general_url", pa.string()),
+        pa.field("documents_url", pa.string()),
+        pa.field("fetched_at", pa.string()),
+        pa.field("warnings", pa.list_(pa.string())),
+        pa.field("error", pa.string()),
+    ]
+)
+
+ATTRIBUTES_SCHEMA = pa.schema(
+    [
+        pa.field("run_id", pa.int64()),
+        pa.field("id", pa.int64()),
+        pa.field("section", pa.string()),
+        pa.field("field_name", pa.string()),
+        pa.field("field_value", pa.string()),
+        pa.field("document_index", pa.int64()),
+        pa.field("document_number", pa.string()),
+    ]
+)
+
+FILES_SCHEMA = pa.schema(
+    [
+        pa.field("run_id", pa.int64()),
+        pa.field("id", pa.int64()),
+        pa.field("file_index", pa.int64()),
+        pa.field("stored_filename", pa.string()),
+        pa.field("stored_path", pa.string()),
+        pa.field("original_filename", pa.string()),
+        pa.field("download_url", pa.string()),
+        pa.field("document_index", pa.int64()),
+        pa.field("document_number", pa.string()),
+        pa.field("page_count", pa.int64()),
+        pa.field("mime_type", pa.string()),
+        pa.field("download_status", pa.string()),
+        pa.field("sha256", pa.string()),
+    ]
+)
+
+
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+# (monotonic time, ISO string); swapped as a whole so readers never see a torn pair.
+_coarse_clock: Tuple[float, str] = (float("-inf"), "")
+
+
+def coarse_utc_now_iso(max_age: float = 1.0) -> str:
+    global _coarse_clock
+    checked_at, value = _coarse_clock
+    now = time.monotonic()
+    if now - checked_at >= max_age:
+        value = utc_now_iso()
+        _coarse_clock = (now, value)
+    return value
+
+
 def setup_logging(log_path: Path, verbose: bool = False) -> logging.Logger:
     logger = logging.getLogger("eis_collector")
     logger.setLevel(logging.DEBUG)
@@ -46,25 +111,97 @@ def setup_logging(log_path: Path, verbose: bool = False) -> logging.Logger:
     return logger
 
 
-def load_processed_ids(path: Path) -> Set[int]:
+class ProcessedIdSet:
+    # One bit per ID instead of a boxed int in a hash set; IDs are dense
+    # integers, so this stays small even for multi-million ranges.
+    def __init__(self, capacity: int = 0) -> None:
+        self._bits = np.zeros((max(0, capacity) >> 3) + 1, dtype=np.uint8)
+
+    def __contains__(self, guarantee_id: int) -> bool:
+        bits = self._bits
+        byte = guarantee_id >> 3
+        return 0 <= byte < len(bits) and bool(bits[byte] & (1 << (guarantee_id & 7)))
+
+    def __len__(self) -> int:
+        return int(np.unpackbits(self._bits).sum())
+
+    def add(self, guarantee_id: int) -> None:
+        # Negative IDs never match in __contains__ and are dropped by update(); a
+        # negative index here would wrap around and mark an unrelated high ID.
+        if guarantee_id < 0:
+            return
+        byte = guarantee_id >> 3
+        self._reserve(byte)
+        self._bits[byte] |= 1 << (guarantee_id & 7)
+
+    def update(self, guarantee_ids: Iterable[int]) -> None:
+        if isinstance(guarantee_ids, np.ndarray):
+            ids = guarantee_ids.astype(np.int64, copy=False)
+        else:
+            ids = np.fromiter(guarantee_ids, dtype=np.int64)
+        ids = ids[ids >= 0]
+        if not len(ids):
+            return
+        self._reserve(int(ids.max()) >> 3)
+        np.bitwise_or.at(self._bits, ids >> 3, (1 << (ids & 7)).astype(np.uint8))
+
+    def _reserve(self, byte: int) -> None:
+        if byte < len(self._bits):
+            return
+        grown = np.zeros(max(byte + 1, len(self._bits) * 2), dtype=np.uint8)
+        grown[: len(self._bits)] = self._bits
+        self._bits = grown
+
+
+def load_processed_ids(path: Path) -> ProcessedIdSet:
+    processed = ProcessedIdSet()
     if not path.exists():
-        return set()
-    processed: Set[int] = set()
-    for line in path.read_text(encoding="utf-8").splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            processed.add(int(line))
-        except ValueError:
-            continue
+        return processed
+    # One read and a single C-level parse instead of an int() per line; a "\n" separator
+    # also swallows blank lines and stray spaces.
+    text = path.read_text(encoding="utf-8")
+    try:
+        with warnings.catch_warnings():
+            # Older numpy only warns on unparsable data and returns a truncated array.
+            warnings.simplefilter("error", DeprecationWarning)
+            ids = np.fromstring(text, dtype=np.int64, sep="\n")
+    except (ValueError, DeprecationWarning):
+        # A torn or hand-edited line; skip the bad entries one by one.
+        ids = np.array([int(token) for token in text.split() if token.isdigit()], dtype=np.int64)
+    processed.update(ids)
     return processed
 
 
-def append_processed_id(path: Path, guarantee_id: int) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as handle:
-        handle.write(f"{guarantee_id}\n")
+class ProcessedIdLog:
+    # Appends are buffered and written with one O_APPEND write per flush_every IDs; after
+    # a crash at most that many IDs are processed again.
+    def __init__(self, path: Path, flush_every: int = 50) -> None:
+        self.path = path
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._buffer: List[str] = []
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def append(self, guarantee_id: int) -> None:
+        with self._lock:
+            self._buffer.append(f"{guarantee_id}\n")
+            if len(self._buffer) >= self.flush_every:
+                self._flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+            os.close(self._fd)
+
+    def _flush(self) -> None:
+        if self._buffer:
+            os.write(self._fd, "".join(self._buffer).encode("ascii"))
+            self._buffer.clear()
 
 
 def load_json(path: Path, default: Any) -> Any:
@@ -80,6 +217,21 @@ def save_json(path: Path, payload: Any) -> None:
         json.dump(payload, handle, ensure_ascii=False, indent=2)
 
 
+META_CACHE_NAME = ".meta.json"
+
+
+def load_meta_cache(id_dir: Path) -> Dict[str, Dict[str, Any]]:
+    # {stored_filename: {mtime_ns, size, sha256, page_count}}; a broken cache is rebuilt.
+    try:
+        return load_json(id_dir / META_CACHE_NAME, {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_meta_cache(id_dir: Path, data: Dict[str, Dict[str, Any]]) -> None:
+    save_json(id_dir / META_CACHE_NAME, data)
+
+
 def next_run_id(path: Path) -> int:
     state = load_json(path, {})
     last_run_id = int(state.get("last_run_id", 0))
@@ -88,41 +240,278 @@ def next_run_id(path: Path) -> int:
     return run_id
 
 
-def update_attribute_union(path: Path, new_fields: Iterable[Dict[str, str]]) -> None:
-    existing = load_json(path, {})
-    union: Dict[str, List[str]] = {
-        section: set(fields) for section, fields in existing.items()
-    }
-    for row in new_fields:
-        section = row.get("section") or ""
-        field = row.get("field_name") or ""
-        if not section or not field:
-            continue
-        union.setdefault(section, set()).add(field)
+class AttributeUnion:
+    # The union lives in memory. Newly seen (section, field) pairs are appended to a small
+    # NDJSON log as they arrive; save() writes the JSON snapshot atomically and empties
+    # the log, and a log left behind by a crash is replayed on load.
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.log_path = path.with_suffix(".ndjson")
+        self._fields: Dict[str, Set[str]] = {
+            section: set(fields) for section, fields in load_json(path, {}).items()
+        }
+        if self.log_path.exists():
+            for line in self.log_path.read_text(encoding="utf-8").splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self._fields.setdefault(record["s"], set()).add(record["f"])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._log = self.log_path.open("a", encoding="utf-8")
+
+    def update(self, new_fields: Iterable[Tuple[str, str]]) -> None:
+        lines: List[str] = []
+        for section, field in new_fields:
+            if not section or not field:
+                continue
+            fields = self._fields.setdefault(section, set())
+            if field not in fields:
+                fields.add(field)
+                lines.append(json.dumps({"s": section, "f": field}, ensure_ascii=False) + "\n")
+        if lines:
+            self._log.write("".join(lines))
+            self._log.flush()
+
+    def save(self) -> None:
+        serialized = {section: sorted(fields) for section, fields in self._fields.items()}
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        save_json(tmp_path, serialized)
+        os.replace(tmp_path, self.path)
+        self._log.seek(0)
+        self._log.truncate()
+
+    def close(self) -> None:
+        self.save()
+        self._log.close()
+
+
+class CheckpointWAL:
+    def __init__(self, path: Path, snapshot_path: Path, snapshot_every: int = 100) -> None:
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last: Dict[str, Any] = {}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = path.open("a", encoding="utf-8")
+
+    def replay(self) -> Dict[str, Any]:
+        try:
+            state: Dict[str, Any] = load_json(self.snapshot_path, {})
+        except ValueError:
+            # A torn snapshot from an older run; the log still holds the latest record.
+            state = {}
+        if not self.path.exists():
+            return state
+        for line in self.path.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                state = json.loads(line)
+            except ValueError:
+                continue
+        return state
+
+    def append(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._handle.write(line)
+            self._handle.flush()
+            self._last = record
+            self._pending += 1
+            if self._pending >= self.snapshot_every:
+                self._snapshot()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pending:
+                self._snapshot()
+            self._handle.close()
+
+    def _snapshot(self) -> None:
+        tmp_path = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+        save_json(tmp_path, self._last)
+        os.replace(tmp_path, self.snapshot_path)
+        self._handle.seek(0)
+        self._handle.truncate()
+        self._pending = 0
+
+
+class HtmlSnapshotWriter:
+    def __init__(self) -> None:
+        self._queue: queue.Queue = queue.Queue()
+        # Directory listings taken once per target dir; replaces a stat per snapshot.
+        self._existing: Dict[Path, Set[str]] = {}
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
 
-    serialized = {section: sorted(list(fields)) for section, fields in union.items()}
-    save_json(path, serialized)
+    def submit(self, path: Path, payload: bytes, force: bool = False) -> None:
+        self._queue.put((path, payload, force))
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _existing_names(self, directory: Path) -> Set[str]:
+        names = self._existing.get(directory)
+        if names is None:
+            directory.mkdir(parents=True, exist_ok=True)
+            with os.scandir(directory) as entries:
+                names = {entry.name for entry in entries}
+            self._existing[directory] = names
+        return names
+
+    def _run(self) -> None:
+        logger = logging.getLogger("eis_collector")
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            path, payload, force = item
+            try:
+                existing = self._existing_names(path.parent)
+                if path.name in existing and not force:
+                    continue
+                path.write_bytes(payload)
+                existing.add(path.name)
+            except OSError:
+                logger.exception("Failed to save HTML snapshot %s", path)
 
 
 class ParquetBatchWriter:
-    def __init__(self, output_dir: Path, prefix: str, batch_size: int = 200) -> None:
+    def __init__(
+        self,
+        output_dir: Path,
+        prefix: str,
+        batch_size: int = 200,
+        row_group_size: int = 8192,
+        schema: Optional[pa.Schema] = None,
+        max_file_bytes: int = 128 * 1024 * 1024,
+        max_file_flushes: int = 8,
+        max_file_seconds: float = 300.0,
+    ) -> None:
         self.output_dir = output_dir
         self.prefix = prefix
         self.batch_size = batch_size
-        self._batch: List[Dict[str, Any]] = []
+        self.row_group_size = row_group_size
+        self.schema = schema
+        self.max_file_bytes = max_file_bytes
+        self.max_file_flushes = max_file_flushes
+        self.max_file_seconds = max_file_seconds
+        self._columns: Dict[str, List[Any]] = {}
+        self._size = 0
+        # Each flush appends row groups to one open file; it is written as *.parquet.part
+        # and renamed once the footer is in place, so readers never glob a torn file.
+        # Rows in a .part file do not survive a crash, so the owner checks due() and
+        # calls finalize() before recording the rows' ids anywhere.
+        self._writer: Optional[pq.ParquetWriter] = None
+        self._sink: Optional[pa.NativeFile] = None
+        self._current_path: Optional[Path] = None
+        self._file_bytes = 0
+        self._file_flushes = 0
+        self._pending_since: Optional[float] = None
+
+    def append(self, record: Dict[str, Any]) -> Optional[Path]:
+        return self.add({name: [value] for name, value in record.items()})
 
-    def add(self, records: Iterable[Dict[str, Any]]) -> None:
-        self._batch.extend(records)
-        if len(self._batch) >= self.batch_size:
-            self.flush()
+    def add(
+        self, records: Union[Iterable[Dict[str, Any]], Dict[str, List[Any]]]
+    ) -> Optional[Path]:
+        # Accepts either row dicts or parallel column lists; rows are kept
+        # column-wise so flush does not have to transpose them.
+        if isinstance(records, dict):
+            columns = records
+        else:
+            rows = list(records)
+            names = dict.fromkeys(name for row in rows for name in row)
+            columns = {name: [row.get(name) for row in rows] for name in names}
+        self._extend(columns)
+        if self._size >= self.batch_size:
+            return self.flush()
+        return None
+
+    def _extend(self, columns: Dict[str, List[Any]]) -> None:
+        count = len(next(iter(columns.values()), []))
+        if not count:
+            return
+        if self._pending_since is None:
+            self._pending_since = time.monotonic()
+        for name, values in columns.items():
+            column = self._columns.get(name)
+            if column is None:
+                column = self._columns[name] = [None] * self._size
+            column.extend(values)
+        self._size += count
+        for column in self._columns.values():
+            if len(column) < self._size:
+                column.extend([None] * (self._size - len(column)))
 
     def flush(self) -> Optional[Path]:
-        if not self._batch:
+        if not self._size:
             return None
+        table = pa.Table.from_pydict(self._columns, schema=self.schema)
+        if self._writer is not None and not table.schema.equals(self._writer.schema):
+            # Only without a declared schema: inferred types moved (e.g. a null column).
+            self._finish_file()
+        if self._writer is None:
+            self._open_file(table.schema)
+        self._writer.write_table(table, row_group_size=self.row_group_size)
+        self._columns = {}
+        self._size = 0
+        self._file_bytes = self._sink.tell()
+        self._file_flushes += 1
+        file_path = self._current_path
+        if self._file_bytes >= self.max_file_bytes:
+            self._finish_file()
+        return file_path
+
+    def due(self) -> bool:
+        # True once rows not yet in a finished file span enough flushes or seconds.
+        if self._pending_since is None:
+            return False
+        return (
+            self._file_flushes >= self.max_file_flushes
+            or time.monotonic() - self._pending_since >= self.max_file_seconds
+        )
+
+    def finalize(self) -> None:
+        self.flush()
+        self._finish_file()
+
+    def close(self) -> None:
+        self.finalize()
+
+    @staticmethod
+    def _partial_path(file_path: Path) -> Path:
+        return file_path.with_name(file_path.name + ".part")
+
+    def _open_file(self, schema: pa.Schema) -> None:
         self.output_dir.mkdir(parents=True, exist_ok=True)
         ts = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-        file_path = self.output_dir / f"{self.prefix}_{ts}_{uuid.uuid4().hex}.parquet"
-        df = pd.DataFrame(self._batch)
-        df.to_parquet(file_path, index=False)
-        self._batch.clear()
-        return file_path
+        self._current_path = self.output_dir / f"{self.prefix}_{ts}_{uuid.uuid4().hex}.parquet"
+        self._sink = pa.OSFile(str(self._partial_path(self._current_path)), "wb")
+        self._writer = pq.ParquetWriter(
+            self._sink,
+            schema,
+            data_page_size=1 << 20,
+            compression="zstd",
+            compression_level=3,
+            use_dictionary=True,
+        )
+        self._file_bytes = 0
+        self._file_flushes = 0
+
+    def _finish_file(self) -> None:
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._sink.close()
+        os.replace(self._partial_path(self._current_path), self._current_path)
+        self._writer = None
+        self._sink = None
+        self._current_path = None
+        if not self._size:
+            self._pending_since = None
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import csv
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+SCRIPT = Path(__file__).resolve().parents[1] / "data" / "eda_wide_table.py"
+DOCUMENT_SECTION = "Документы: Информация о банковской гарантии"
+
+
+def _write_csv(path: Path, header: list[str], rows: list[list[object]]) -> None:
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+class EdaWideTableCsvTest(unittest.TestCase):
+    def test_all_empty_sha256_column(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            final_dir = root / "data" / "processed" / "final"
+            final_dir.mkdir(parents=True)
+            attachments = root / "data" / "raw" / "attachments"
+
+            file_rows = []
+            for guarantee_id in (11, 12):
+                id_dir = attachments / str(guarantee_id)
+                id_dir.mkdir(parents=True)
+                # Two files per id with empty hashes: the smaller one must be selected.
+                for file_index, size in ((1, 300), (2, 100)):
+                    path = id_dir / f"{guarantee_id}_{file_index}.pdf"
+                    path.write_bytes(b"x" * size)
+                    file_rows.append(
+                        [1, guarantee_id, file_index, 1, path.name, str(path), ""]
+                    )
+
+            _write_csv(final_dir / "guarantees_latest.csv", ["run_id", "id"], [[1, 11], [1, 12]])
+            _write_csv(
+                final_dir / "attributes_latest.csv",
+                ["run_id", "id", "section", "field_name", "field_value", "document_index"],
+                [
+                    [1, guarantee_id, DOCUMENT_SECTION, field_name, field_value, 1]
+                    for guarantee_id in (11, 12)
+                    for field_name, field_value in (
+                        ("Редакция", "Действующая"),
+                        ("Размещено", "29.06.2018 21:17 (МСК+1)"),
+                        ("Номер банковской гарантии", f"N-{guarantee_id}"),
+                    )
+                ],
+            )
+            _write_csv(
+                final_dir / "files_latest.csv",
+                [
+                    "run_id",
+                    "id",
+                    "file_index",
+                    "document_index",
+                    "stored_filename",
+                    "stored_path",
+                    "sha256",
+                ],
+                file_rows,
+            )
+
+            result = subprocess.run(
+                [sys.executable, str(SCRIPT)], cwd=root, capture_output=True, text=True
+            )
+            self.assertEqual(result.returncode, 0, result.stderr)
+
+            wide = pd.read_parquet(final_dir / "wide_analytical_latest.parquet")
+            selected = dict(zip(wide["id"], wide["stored_filename"]))
+            self.assertEqual(selected, {11: "11_2.pdf", 12: "12_2.pdf"})
+
+
+if __name__ == "__main__":
+    unittest.main()